@@ -2,168 +2,169 @@
 Mock API -
 Simulates flight and hotel search backends.
 Returns realistic structured data.
+Searches run against the flight schedule and hotel list in backend.inventory.
+Results are shared by every session in the process through SearchCache.
 """
 from __future__ import annotations
-import copy, random, string
-from datetime import datetime, timedelta
+import random, string, threading, time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterator, Optional
+
+from .inventory import FlightInventory, HotelInventory, parse_date
+from .metrics import SEARCH_CACHE
+from .models import Offer
 
 
 def _ref(prefix: str) -> str:
     return prefix + "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
 
-# ── FLIGHT DATA 
-FLIGHTS = [
-    {
-        "id": "F001",
-        "airline": "IndiGo",
-        "airline_code": "6E",
-        "flight_no": "6E-205",
-        "departure": "06:00",
-        "arrival": "08:05",
-        "duration": "2h 05m",
-        "stops": 0,
-        "stops_label": "Non-stop",
-        "fare": {"base": 3200, "taxes": 640, "total": 3840},
-        "currency": "INR",
-        "class": "Economy",
-        "refundable": False,
-        "cancellation_policy": "Non-refundable. Change fee ₹2,000 applies.",
-        "baggage": "15 kg check-in · 7 kg cabin",
-        "seats_left": 8,
-        "rating": 3.9,
-    },
-    {
-        "id": "F002",
-        "airline": "Air India",
-        "airline_code": "AI",
-        "flight_no": "AI-665",
-        "departure": "09:30",
-        "arrival": "11:45",
-        "duration": "2h 15m",
-        "stops": 0,
-        "stops_label": "Non-stop",
-        "fare": {"base": 4100, "taxes": 820, "total": 4920},
-        "currency": "INR",
-        "class": "Economy",
-        "refundable": True,
-        "cancellation_policy": "Fully refundable up to 24h before departure. No change fee.",
-        "baggage": "25 kg check-in · 8 kg cabin",
-        "seats_left": 15,
-        "rating": 4.1,
-    },
-    {
-        "id": "F003",
-        "airline": "Vistara",
-        "airline_code": "UK",
-        "flight_no": "UK-985",
-        "departure": "14:15",
-        "arrival": "16:20",
-        "duration": "2h 05m",
-        "stops": 0,
-        "stops_label": "Non-stop",
-        "fare": {"base": 5500, "taxes": 1100, "total": 6600},
-        "currency": "INR",
-        "class": "Business",
-        "refundable": True,
-        "cancellation_policy": "Fully refundable anytime. No fees.",
-        "baggage": "35 kg check-in · 12 kg cabin",
-        "seats_left": 4,
-        "rating": 4.6,
-    },
-]
-
-HOTELS = [
-    {
-        "id": "H001",
-        "name": "The Leela Palace",
-        "stars": 5,
-        "location": "Chanakyapuri, Central Delhi",
-        "room_type": "Deluxe Room",
-        "price_per_night": 15000,
-        "currency": "INR",
-        "amenities": [
-            "Outdoor swimming pool",
-            "World-class spa",
-            "4 signature restaurants",
-            "Free high-speed Wi-Fi",
-            "Airport limousine service",
-            "24h butler service",
-            "Business center",
-            "Fitness center",
-        ],
-        "cancellation_policy": "Free cancellation up to 48h before check-in.",
-        "rating": 4.8,
-        "reviews": 2841,
-        "breakfast_included": True,
-        "highlights": ["Luxury", "City view", "Award-winning spa"],
-    },
-    {
-        "id": "H002",
-        "name": "Taj Hotel & Convention Centre",
-        "stars": 5,
-        "location": "Diplomatic Enclave",
-        "room_type": "Superior Room",
-        "price_per_night": 11500,
-        "currency": "INR",
-        "amenities": [
-            "3 swimming pools",
-            "Beach-style pool",
-            "Spa & wellness center",
-            "3 restaurants + bar",
-            "Free Wi-Fi",
-            "Gym",
-            "Kids club",
-            "Concierge",
-        ],
-        "cancellation_policy": "Free cancellation up to 72h. One night charge after.",
-        "rating": 4.5,
-        "reviews": 1923,
-        "breakfast_included": True,
-        "highlights": ["Heritage", "Central location", "Great dining"],
-    },
-    {
-        "id": "H003",
-        "name": "Novotel New Delhi",
-        "stars": 4,
-        "location": "Aerocity, Near IGI Airport",
-        "room_type": "Standard Room",
-        "price_per_night": 6200,
-        "currency": "INR",
-        "amenities": [
-            "Rooftop pool",
-            "Restaurant & bar",
-            "Free Wi-Fi",
-            "Gym",
-            "24h reception",
-            "Airport shuttle",
-        ],
-        "cancellation_policy": "Non-refundable rate. No changes allowed.",
-        "rating": 4.1,
-        "reviews": 4102,
-        "breakfast_included": False,
-        "highlights": ["Budget-friendly", "Near airport", "Modern"],
-    },
-]
-
-
-def search_flights(origin: str, destination: str, date: str, passengers: int) -> list[dict]:
+# ── FLIGHT DATA ───────────────────────────────────────────────
+# The bundled schedule (backend/data/flights.csv) unless use_flights()
+# swapped in another at startup.
+_flights = FlightInventory.load()
+
+
+def use_flights(inventory: FlightInventory) -> None:
+    global _flights
+    _flights = inventory
+    _results.clear()
+
+
+def flight_inventory() -> FlightInventory:
+    return _flights
+
+
+# ── HOTEL DATA ────────────────────────────────────────────────
+# Likewise backend/data/hotels.csv unless use_hotels() replaced it.
+_hotels = HotelInventory.load()
+
+
+def use_hotels(inventory: HotelInventory) -> None:
+    global _hotels
+    _hotels = inventory
+    _results.clear()
+
+
+def hotel_inventory() -> HotelInventory:
+    return _hotels
+
+
+# ── SHARED RESULTS ────────────────────────────────────────────
+
+class SearchCache:
+    """
+    Search results shared by all sessions: many ask for the same popular
+    route and date, and each then holds references to the same offers
+    (and their cached JSON) instead of its own copies.
+
+    The inventories are read-only (seat and room counts never change while
+    serving), so entries only live `ttl` seconds and the least recently
+    used go past `max_size`. clear() drops everything when use_flights()
+    or use_hotels() swaps an inventory; a search that was running across
+    it is not stored.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size   = max_size
+        self.ttl        = ttl
+        self.hits       = 0
+        self.misses     = 0
+        self.generation = 0                   # bumped by clear()
+        self._entries: OrderedDict[tuple, tuple[float, tuple[Offer, ...]]] = OrderedDict()
+        self._lock      = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[tuple[Offer, ...]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        SEARCH_CACHE.inc(key[0], "miss" if entry is None else "hit")
+        return None if entry is None else entry[1]
+
+    def put(self, key: tuple, offers: tuple[Offer, ...], generation: int) -> None:
+        """Store a search started at `generation`, unless clear() has run since."""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, offers)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_results = SearchCache(10_000, 300)
+
+
+def use_search_cache(max_size: int, ttl: float) -> None:
+    """Replace the shared results with a cache of `max_size` searches kept `ttl` seconds; 0 disables it."""
+    global _results
+    _results = SearchCache(max_size, ttl)
+
+
+def search_cache() -> SearchCache:
+    return _results
+
+
+def _shared(key: tuple, search) -> Iterator[Offer]:
+    """
+    A stored search, or a fresh one yielded offer by offer and stored once
+    it completes; a search abandoned part way is not stored.
+    """
+    hit = _results.get(key)
+    if hit is not None:
+        yield from hit
+        return
+    cache      = _results
+    generation = cache.generation
+    offers     = []
+    for offer in search():
+        offers.append(offer)
+        yield offer
+    cache.put(key, tuple(offers), generation)
+
+
+def iter_flights(origin: str, destination: str, date: str, passengers: int,
+                 limit: Optional[int] = None) -> Iterator[Offer]:
+    """
+    Yield flight offers with seats for everyone, cheapest first, as the
+    backend produces them. Repeated searches (any date format, any case)
+    are answered from the shared results until the entry expires.
+    """
+    o, d = origin.upper(), destination.upper()
+    day = parse_date(date)
+    if day is None:
+        yield from _flights.search(origin, destination, date, passengers, limit)
+        return
+    yield from _shared(("flight", o, d, day, passengers, limit),
+                       lambda: _flights.search(origin, destination, date, passengers, limit))
+
+
+def search_flights(origin: str, destination: str, date: str, passengers: int,
+                   limit: Optional[int] = None) -> list[Offer]:
     """Search flights and return enriched results."""
-    results = copy.deepcopy(FLIGHTS)
-    for f in results:
-        f["date"]        = date
-        f["passengers"]  = passengers
-        f["origin"]      = origin
-        f["destination"] = destination
-        # Scale total by passenger count
-        base  = f["fare"]["base"]
-        taxes = f["fare"]["taxes"]
-        f["fare"]["total"] = (base + taxes) * passengers
-        f["fare"]["per_person"] = base + taxes
-    return results
-
-
-def confirm_flight_booking(offer: dict, passenger: dict) -> dict:
+    return list(iter_flights(origin, destination, date, passengers, limit))
+
+
+def confirm_flight_booking(offer: Offer, passenger: dict) -> dict:
     return {
         "booking_ref": _ref("FL"),
         "pnr":         _ref(""),
@@ -185,28 +186,33 @@ def confirm_flight_booking(offer: dict, passenger: dict) -> dict:
     }
 
 
-def search_hotels(city: str, checkin: str, checkout: str, guests: int) -> list[dict]:
+def iter_hotels(city: str, checkin: str, checkout: str, guests: int,
+                limit: Optional[int] = None, sort: str = "price", **filters) -> Iterator[Offer]:
+    """
+    Yield hotel offers as the backend produces them. `sort` is "price"
+    (cheapest first), "stars" or "rating" (highest first); `filters` are
+    min_price, max_price, min_stars, max_stars and min_rating, e.g. 4+
+    stars under ₹8,000 by rating:
+
+        iter_hotels("DEL", ci, co, 2, min_stars=4, max_price=8000, sort="rating")
+
+    Shared like iter_flights().
+    """
+    c, ci, co = city.strip().upper(), parse_date(checkin), parse_date(checkout)
+    if ci is None or co is None:
+        yield from _hotels.search(city, checkin, checkout, guests, sort=sort, limit=limit, **filters)
+        return
+    yield from _shared(("hotel", c, ci, co, guests, limit, sort, tuple(sorted(filters.items()))),
+                       lambda: _hotels.search(city, checkin, checkout, guests, sort=sort, limit=limit, **filters))
+
+
+def search_hotels(city: str, checkin: str, checkout: str, guests: int,
+                  limit: Optional[int] = None, sort: str = "price", **filters) -> list[Offer]:
     """Search hotels and return enriched results."""
-    from datetime import datetime as dt
-    try:
-        ci = dt.strptime(checkin, "%Y-%m-%d")
-        co = dt.strptime(checkout, "%Y-%m-%d")
-        nights = max(1, (co - ci).days)
-    except Exception:
-        nights = 1
-
-    results = copy.deepcopy(HOTELS)
-    for h in results:
-        h["city"]         = city
-        h["checkin"]      = checkin
-        h["checkout"]     = checkout
-        h["nights"]       = nights
-        h["guests"]       = guests
-        h["total_price"]  = h["price_per_night"] * nights
-    return results
-
-
-def confirm_hotel_booking(offer: dict, guest: dict) -> dict:
+    return list(iter_hotels(city, checkin, checkout, guests, limit, sort, **filters))
+
+
+def confirm_hotel_booking(offer: Offer, guest: dict) -> dict:
     return {
         "booking_ref": _ref("HT"),
         "status":      "CONFIRMED",
@@ -0,0 +1,384 @@
+"""
+App Core -
+
+The one request handler behind every transport. Routing, CORS, JSON and
+gzip, static files, rate limiting and metrics are implemented here once;
+server.py only adapts it to a server:
+
+  App.handle(Request) → Response     plain calls, used by run_stdlib
+  App.wsgi(environ, start_response)  any WSGI server (run_flask, gunicorn, …)
+  App.asgi(scope, receive, send)     any ASGI server (uvicorn, hypercorn, …)
+
+Handlers block (engine turns, long-polls), so the ASGI adapter runs them
+on its own thread pool rather than on the event loop.
+"""
+from __future__ import annotations
+import asyncio, json, threading, traceback, urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Callable, Iterable, Optional, Union
+
+from .limits import Limits, Rejected
+from .metrics import REGISTRY, HTTP_SECONDS
+from .sessions import process_batch
+from .web import StaticFiles, encode_body, json_bytes, sse_event, unquote_etag
+from .workers import WorkerLost, WorkerPool
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin":  "*",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+}
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class BadRequest(Exception):
+    """Malformed request body; answered with 400 and the message."""
+
+
+class Headers(dict):
+    """Request headers, looked up case-insensitively."""
+
+    def __init__(self, items: Iterable[tuple[str, str]] = ()):
+        super().__init__((k.lower(), v) for k, v in items)
+
+    def get(self, key: str, default=None):
+        return super().get(key.lower(), default)
+
+
+def query_dict(qs: str) -> dict[str, str]:
+    """First value of each query-string parameter."""
+    return {k: v[0] for k, v in urllib.parse.parse_qs(qs).items()}
+
+
+@dataclass
+class Request:
+    method:   str
+    path:     str
+    query:    dict[str, str] = field(default_factory=dict)
+    headers:  Headers        = field(default_factory=Headers)
+    body:     bytes          = b""
+    client:   Optional[str]  = None       # peer IP, for rate limits
+    endpoint: str            = "other"    # matched route, for metric labels
+
+    def json(self) -> dict:
+        with HTTP_SECONDS.time("parse", self.endpoint):
+            try:
+                data = json.loads(self.body) if self.body else {}
+            except ValueError:
+                raise BadRequest("body is not valid JSON") from None
+        if not isinstance(data, dict):
+            raise BadRequest("body must be a JSON object")
+        return data
+
+
+@dataclass
+class Response:
+    status:   int
+    headers:  dict[str, str] = field(default_factory=dict)
+    body:     Union[bytes, Iterable[bytes]] = b""
+    on_close: Optional[Callable[[], None]]  = None
+
+    @property
+    def streaming(self) -> bool:
+        return not isinstance(self.body, bytes)
+
+    @property
+    def status_line(self) -> str:
+        return f"{self.status} {HTTPStatus(self.status).phrase}"
+
+    def close(self) -> None:
+        """Release what the response holds (stream, admission slot); idempotent."""
+        close = getattr(self.body, "close", None)
+        if close:
+            close()
+        on_close, self.on_close = self.on_close, None
+        if on_close:
+            on_close()
+
+
+class _WSGIBody:
+    """WSGI response iterable whose close() reaches Response.close()."""
+
+    def __init__(self, resp: Response, head: bool):
+        self.resp = resp
+        self.head = head
+
+    def __iter__(self):
+        if self.head:
+            return iter(())
+        return iter((self.resp.body,)) if not self.resp.streaming else iter(self.resp.body)
+
+    def close(self) -> None:
+        self.resp.close()
+
+
+def memory_args(query: dict, headers: Headers, wait_max: float) -> tuple[str, str, float]:
+    """
+    (session_id, since, wait) from /api/memory query args and headers;
+    `since` keeps the "-gz" suffix of a gzip variant's tag (see App.memory).
+    """
+    sid   = query.get("session_id", "default")
+    since = query.get("since") or unquote_etag(headers.get("If-None-Match"))
+    try:
+        wait = min(max(float(query.get("wait", 0)), 0.0), wait_max)
+    except ValueError:
+        wait = 0.0
+    return sid, since, wait
+
+
+def chat_args(body: dict) -> tuple[str, str]:
+    """(session_id, message) of a /api/chat or /api/chat/stream body; raises BadRequest if malformed."""
+    message = body.get("message", "")
+    if not isinstance(message, str):
+        raise BadRequest("'message' must be a string")
+    return str(body.get("session_id", "default")), message.strip()
+
+
+def parse_batch(body: dict, max_items: int) -> list[tuple[str, str]]:
+    """
+    Body: {"session_id": default, "messages": [{"session_id", "message"} | str, ...]}
+    Returns ordered (session_id, message) pairs; raises BadRequest if malformed.
+    """
+    default  = body.get("session_id", "default")
+    messages = body.get("messages")
+    if not isinstance(messages, list):
+        raise BadRequest("'messages' must be a list")
+    if len(messages) > max_items:
+        raise BadRequest(f"at most {max_items} messages per batch")
+    items = []
+    for m in messages:
+        if isinstance(m, str):
+            m = {"message": m}
+        if not isinstance(m, dict):
+            raise BadRequest("each message must be a string or an object")
+        items.append((str(m.get("session_id", default)), str(m.get("message", "")).strip()))
+    return items
+
+
+class App:
+    def __init__(self, sessions, static: StaticFiles, limits: Limits, *,
+                 batch_max: int = 500, batch_threads: int = 8,
+                 memory_wait_max: float = 25.0, threads: int = 32):
+        self.sessions        = sessions
+        self.static          = static
+        self.limits          = limits
+        self.batch_max       = batch_max
+        self.batch_threads   = batch_threads
+        self.memory_wait_max = memory_wait_max
+        self.threads         = threads
+        # Long-polls hold a request thread while they wait; past a quarter
+        # of the threads, /api/memory answers at once and the client polls again.
+        self.max_polls       = max(1, threads // 4)
+        self._polls          = 0
+        self._polls_lock     = threading.Lock()
+        self.batch_pool      = ThreadPoolExecutor(max_workers=batch_threads, thread_name_prefix="batch")
+        self._executor: Optional[ThreadPoolExecutor] = None    # ASGI only
+        self.routes: dict[tuple[str, str], Callable[[Request], Response]] = {
+            ("GET",  "/api/memory"):      self.memory,
+            ("GET",  "/metrics"):         self.metrics,
+            ("POST", "/api/chat"):        self.chat,
+            ("POST", "/api/chat/stream"): self.chat_stream,
+            ("POST", "/api/chat/batch"):  self.chat_batch,
+            ("POST", "/api/reset"):       self.reset,
+        }
+
+    # ── Dispatch ──────────────────────────────────────────────
+
+    def handle(self, req: Request) -> Response:
+        try:
+            resp = self._dispatch(req)
+        except Rejected as e:
+            resp = self.json(req, {"error": e.reason, "retry_after": e.retry_after},
+                             e.status, {"Retry-After": str(e.retry_after)})
+        except BadRequest as e:
+            resp = self.json(req, {"error": str(e)}, 400)
+        except WorkerLost as e:
+            resp = self.json(req, {"error": str(e), "retry_after": 1}, 503, {"Retry-After": "1"})
+        except Exception:
+            traceback.print_exc()                 # details go to the log, not the client
+            resp = self.json(req, {"error": "internal server error"}, 500)
+        resp.headers.update(CORS_HEADERS)
+        return resp
+
+    def _dispatch(self, req: Request) -> Response:
+        if req.method == "OPTIONS":
+            return Response(204)
+        method  = "GET" if req.method == "HEAD" else req.method
+        handler = self.routes.get((method, req.path))
+        if handler:
+            req.endpoint = req.path
+            return handler(req)
+        if method == "GET":
+            asset = self.static.get(req.path)
+            if asset is not None:
+                return Response(*self.static.respond(asset, req.headers))
+        return self.json(req, {"error": "not found"}, 404)
+
+    def json(self, req: Request, obj, status: int = 200, headers: dict = None) -> Response:
+        with HTTP_SECONDS.time("encode", req.endpoint):
+            data = json_bytes(obj)
+        with HTTP_SECONDS.time("compress", req.endpoint):
+            data, encoding = encode_body(data, req.headers.get("Accept-Encoding"))
+        out = {"Content-Type": "application/json", "Vary": "Accept-Encoding", **(headers or {})}
+        if encoding:
+            out["Content-Encoding"] = encoding
+        return Response(status, out, data)
+
+    # ── Routes ────────────────────────────────────────────────
+
+    def chat(self, req: Request) -> Response:
+        sid, msg = chat_args(req.json())
+        resp = []
+        if msg:
+            with self.limits.admit(sid, req.client):
+                resp = self.sessions.process(sid, msg)
+        return self.json(req, {"responses": resp})
+
+    def chat_stream(self, req: Request) -> Response:
+        sid, msg = chat_args(req.json())
+        headers = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        if not msg:
+            return Response(200, headers, iter([sse_event("done", {"responses": []})]))
+        self.limits.enter(sid, req.client)      # held until the stream is closed
+        events = self.sessions.process_stream(sid, msg)
+        return Response(200, headers, (sse_event(n, d) for n, d in events), self.limits.leave)
+
+    def chat_batch(self, req: Request) -> Response:
+        items = parse_batch(req.json(), self.batch_max)
+        turns: dict[str, int] = {}
+        for sid, msg in items:
+            if msg:
+                turns[sid] = turns.get(sid, 0) + 1
+        # Sessions run in parallel on the batch threads, so the batch holds
+        # as many admission slots as it can have turns in flight.
+        with self.limits.admit_batch(req.client, turns, max(1, min(len(turns), self.batch_threads))):
+            results = process_batch(self.sessions, items, self.batch_pool)
+        return self.json(req, {"results": [
+            {"session_id": sid, "message": msg, "responses": resp}
+            for (sid, msg), resp in zip(items, results)
+        ]})
+
+    def memory(self, req: Request) -> Response:
+        sid, since, wait = memory_args(req.query, req.headers, self.memory_wait_max)
+        # The gzip body gets its own tag, as web.StaticAsset does: the tag
+        # names one representation, and caches may store both.
+        suffix = "-gz" if since and since.endswith("-gz") else ""
+        since  = since and since.removesuffix(suffix)
+        polling = False
+        if wait:
+            with self._polls_lock:
+                polling = self._polls < self.max_polls
+                self._polls += polling
+        try:
+            tag, snap = self.sessions.memory(sid, since, wait if polling else 0.0)
+        finally:
+            if polling:
+                with self._polls_lock:
+                    self._polls -= 1
+        if snap is None:
+            return Response(304, {"ETag": f'"{tag}{suffix}"', "Cache-Control": "no-cache"})
+        resp = self.json(req, snap, headers={"Cache-Control": "no-cache"})
+        resp.headers["ETag"] = f'"{tag}-gz"' if "Content-Encoding" in resp.headers else f'"{tag}"'
+        return resp
+
+    def reset(self, req: Request) -> Response:
+        self.sessions.reset(str(req.json().get("session_id", "default")))
+        return self.json(req, {"ok": True})
+
+    def metrics(self, req: Request) -> Response:
+        """Prometheus exposition: this process's series, the workers', store stats."""
+        snap = REGISTRY.snapshot()
+        if isinstance(self.sessions, WorkerPool):
+            snap = REGISTRY.merge([snap, self.sessions.metrics()])
+        gauges = {"smart_travel_sessions" if k == "sessions" else f"smart_travel_sessions_{k}": v
+                  for k, v in self.sessions.stats().items()}
+        gauges.update({f"smart_travel_admission_{k}": v for k, v in self.limits.stats().items()})
+        return Response(200, {"Content-Type": METRICS_CONTENT_TYPE}, REGISTRY.render(snap, gauges))
+
+    # ── WSGI ──────────────────────────────────────────────────
+
+    def wsgi(self, environ: dict, start_response) -> _WSGIBody:
+        headers = Headers((k[5:].replace("_", "-"), v) for k, v in environ.items()
+                          if k.startswith("HTTP_"))
+        if environ.get("CONTENT_TYPE"):
+            headers["content-type"] = environ["CONTENT_TYPE"]
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        req = Request(
+            method  = environ["REQUEST_METHOD"],
+            path    = environ.get("PATH_INFO") or "/",
+            query   = query_dict(environ.get("QUERY_STRING", "")),
+            headers = headers,
+            body    = environ["wsgi.input"].read(length) if length > 0 else b"",
+            client  = environ.get("REMOTE_ADDR"),
+        )
+        resp = self.handle(req)
+        out  = list(resp.headers.items())
+        if not resp.streaming:
+            out.append(("Content-Length", str(len(resp.body))))
+        start_response(resp.status_line, out)
+        return _WSGIBody(resp, head=req.method == "HEAD")
+
+    # ── ASGI ──────────────────────────────────────────────────
+
+    async def asgi(self, scope: dict, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    self.close()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        chunks, more = [], True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        req = Request(
+            method  = scope["method"],
+            path    = scope["path"],
+            query   = query_dict(scope.get("query_string", b"").decode("latin-1")),
+            headers = Headers((k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]),
+            body    = b"".join(chunks),
+            client  = (scope.get("client") or (None,))[0],
+        )
+        loop = asyncio.get_running_loop()
+        pool = self.executor
+        resp = await loop.run_in_executor(pool, self.handle, req)
+        try:
+            headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in resp.headers.items()]
+            if not resp.streaming:
+                headers.append((b"content-length", str(len(resp.body)).encode()))
+            await send({"type": "http.response.start", "status": resp.status, "headers": headers})
+            if req.method == "HEAD":
+                await send({"type": "http.response.body", "body": b""})
+            elif not resp.streaming:
+                await send({"type": "http.response.body", "body": resp.body})
+            else:
+                it = iter(resp.body)
+                while (chunk := await loop.run_in_executor(pool, next, it, None)) is not None:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await loop.run_in_executor(pool, resp.close)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="app")
+        return self._executor
+
+    def close(self) -> None:
+        self.batch_pool.shutdown(wait=False)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.sessions.close()
@@ -13,46 +13,90 @@ All responses are dicts with:
     "data": dict | None,   # structured payload for UI rendering
     "meta": dict,          # session metadata
   }
+
+Search results can also be observed as they arrive: pass `on_event` to
+process() and it is called with ("results_start" | "offer" | "results_end",
+payload) while a search runs, before the turn's responses are returned.
 """
 from __future__ import annotations
-from typing import Optional
+from time import perf_counter
+from typing import Callable, Iterable, Optional
 import uuid
 
 from .models import (
     SessionMemory, ServiceType, FlowStep,
     FlightContext, HotelContext,
 )
-from .intent import classify, IntentResult
+from .intent import ENGINES, IntentResult
 from .api import (
-    search_flights, confirm_flight_booking,
-    search_hotels,  confirm_hotel_booking,
+    iter_flights, confirm_flight_booking,
+    iter_hotels,  confirm_hotel_booking,
 )
+from .metrics import STAGE_SECONDS, TURNS
+
+EventSink = Callable[[str, dict], None]
+
+
+def _option_list(n: int) -> str:
+    """"**Option 1**, **Option 2**, or **Option 3**" for n offers."""
+    opts = [f"**Option {i}**" for i in range(1, n + 1)]
+    if n <= 1:
+        return opts[0] if opts else ""
+    if n > 3:
+        return f"{opts[0]} to {opts[-1]}"
+    return f"{', '.join(opts[:-1])}{',' if n > 2 else ''} or {opts[-1]}"
 
 
 class TravelEngine:
-    def __init__(self):
+    # Key of intent.ENGINES: set on the class for a whole deployment, or
+    # per engine. A class attribute, so pickled sessions follow the default.
+    classifier = "rules"
+    # Offers shown per search (cheapest flights, best-rated hotels); the rest are not kept.
+    max_results = 5
+
+    def __init__(self, classifier: Optional[str] = None):
+        if classifier:
+            self.classifier = classifier
         self.memory = SessionMemory(session_id=str(uuid.uuid4())[:8])
         self._awaiting_slot: Optional[str] = None  # what we last asked for
+        self._on_event: Optional[EventSink] = None  # set only during process()
+        self._intent: str = ""                      # metrics label, likewise
 
     # ── Public API ────────────────────────────────────────────
 
-    def process(self, user_input: str) -> list[dict]:
+    def process(self, user_input: str, on_event: Optional[EventSink] = None) -> list[dict]:
         """Process one user turn. Returns list of response messages."""
         if not user_input.strip():
             return []
 
-        intent = classify(user_input, self._awaiting_slot)
+        t0 = perf_counter()
+        intent = ENGINES[self.classifier](user_input, self._awaiting_slot)
+        t1 = perf_counter()
+        STAGE_SECONDS.observe(t1 - t0, "classify", intent.intent, intent.service or "none")
         self.memory.log("user", user_input, {"intent": intent.intent, "slots": intent.slots})
 
-        responses = self._route(intent)
+        self._on_event = on_event
+        self._intent   = intent.intent
+        try:
+            responses = self._route(intent)
+        finally:
+            self._on_event = None
+            self._intent   = ""
+        service = self.memory.active_service.value
+        STAGE_SECONDS.observe(perf_counter() - t1, "route", intent.intent, service)
+        TURNS.inc(intent.intent, service)
 
         for r in responses:
             self.memory.log("assistant", r.get("text", ""), {"type": r.get("type")})
+        self.memory.touch()
 
         return responses
 
     def get_memory_snapshot(self) -> dict:
-        return self.memory.to_dict()
+        return self.memory.snapshot()
+
+    def memory_etag(self) -> str:
+        return self.memory.etag
 
     # ── Routing ───────────────────────────────────────────────
 
@@ -189,11 +233,18 @@ class TravelEngine:
         # All slots filled — run search
         ctx.step = FlowStep.SEARCHING
         self._awaiting_slot = None
-        results = search_flights(
-            sp.origin.value, sp.destination.value,
-            sp.travel_date.value, int(sp.passengers.value)
+        results = self._collect_offers(
+            "flight",
+            iter_flights(sp.origin.value, sp.destination.value,
+                         sp.travel_date.value, int(sp.passengers.value), self.max_results),
+            f"Searching flights {sp.origin.value} → {sp.destination.value} on {sp.travel_date.value}…",
         )
         ctx.search_results = results
+        if not results:
+            ctx.step = FlowStep.COLLECTING
+            return [self._msg(
+                f"No flights with {sp.passengers.value} seat(s) from {sp.origin.value} → {sp.destination.value} "
+                f"on {sp.travel_date.value}. Try another date or route.")]
         ctx.step = FlowStep.RESULTS
 
         return [
@@ -204,7 +255,7 @@ class TravelEngine:
                 "data": {"flights": results, "origin": sp.origin.value, "destination": sp.destination.value},
                 "meta": self._meta(),
             },
-            self._msg("Reply with **Option 1**, **Option 2**, or **Option 3** to select a flight, or ask me anything about them."),
+            self._msg(f"Reply with {_option_list(len(results))} to select a flight, or ask me anything about them."),
         ]
 
     def _flight_select(self, ctx: FlightContext, index: Optional[int]) -> list[dict]:
@@ -212,7 +263,7 @@ class TravelEngine:
             return self._flight_collect(ctx)
 
         if not index or index > len(ctx.search_results):
-            return [self._msg(f"Please choose Option 1, 2, or 3.")]
+            return [self._msg(f"Please choose an option from 1 to {len(ctx.search_results)}.")]
 
         ctx.selected_offer = ctx.search_results[index - 1]
         ctx.step = FlowStep.VERIFYING
@@ -327,9 +378,10 @@ class TravelEngine:
             ]
 
         # Actually book
-        ctx.step = FlowStep.BOOKED
         self._awaiting_slot = None
-        booking = confirm_flight_booking(ctx.selected_offer, passenger)
+        with STAGE_SECONDS.time("confirm", self._intent, "flight"):
+            booking = confirm_flight_booking(ctx.selected_offer, passenger)
+        ctx.step = FlowStep.BOOKED
         ctx.booking_ref = booking["booking_ref"]
 
         return [{
@@ -425,11 +477,18 @@ class TravelEngine:
 
         ctx.step = FlowStep.SEARCHING
         self._awaiting_slot = None
-        results = search_hotels(
-            sp.city.value, sp.checkin_date.value,
-            sp.checkout_date.value, int(sp.guests.value)
+        results = self._collect_offers(
+            "hotel",
+            iter_hotels(sp.city.value, sp.checkin_date.value, sp.checkout_date.value,
+                        int(sp.guests.value), self.max_results, sort="rating"),
+            f"Searching hotels in {sp.city.value} · {sp.checkin_date.value} to {sp.checkout_date.value}…",
         )
         ctx.search_results = results
+        if not results:
+            ctx.step = FlowStep.COLLECTING
+            return [self._msg(
+                f"No hotels with a room free in {sp.city.value} from {sp.checkin_date.value} "
+                f"to {sp.checkout_date.value}. Try other dates or another city.")]
         ctx.step = FlowStep.RESULTS
 
         return [
@@ -440,14 +499,14 @@ class TravelEngine:
                 "data": {"hotels": results, "city": sp.city.value},
                 "meta": self._meta(),
             },
-            self._msg("Reply with **Option 1**, **Option 2**, or **Option 3** — or ask about any hotel's amenities, policy, or pricing."),
+            self._msg(f"Reply with {_option_list(len(results))} — or ask about any hotel's amenities, policy, or pricing."),
         ]
 
     def _hotel_select(self, ctx: HotelContext, index: Optional[int]) -> list[dict]:
         if not ctx.search_results:
             return self._hotel_collect(ctx)
         if not index or index > len(ctx.search_results):
-            return [self._msg("Please choose Option 1, 2, or 3.")]
+            return [self._msg(f"Please choose an option from 1 to {len(ctx.search_results)}.")]
 
         ctx.selected_offer = ctx.search_results[index - 1]
         ctx.step = FlowStep.VERIFYING
@@ -558,9 +617,10 @@ class TravelEngine:
                  "meta": self._meta()},
             ]
 
-        ctx.step = FlowStep.BOOKED
         self._awaiting_slot = None
-        booking = confirm_hotel_booking(ctx.selected_offer, guest)
+        with STAGE_SECONDS.time("confirm", self._intent, "hotel"):
+            booking = confirm_hotel_booking(ctx.selected_offer, guest)
+        ctx.step = FlowStep.BOOKED
         ctx.booking_ref = booking["booking_ref"]
 
         return [{
@@ -649,6 +709,26 @@ class TravelEngine:
 
     # ── Helpers ───────────────────────────────────────────────
 
+    def _collect_offers(self, service: str, offers: Iterable[dict], header: str) -> list[dict]:
+        """Drain a search, reporting each offer to the event sink as it arrives."""
+        emit = self._on_event
+        if emit:
+            emit("results_start", {"service": service, "text": header})
+        results = []
+        spent = 0.0                       # search time only, not the sink's
+        t = perf_counter()
+        for offer in offers:
+            spent += perf_counter() - t
+            results.append(offer)
+            if emit:
+                emit("offer", {"service": service, "index": len(results), "offer": offer})
+            t = perf_counter()
+        spent += perf_counter() - t
+        STAGE_SECONDS.observe(spent, "search", self._intent, service)
+        if emit:
+            emit("results_end", {"service": service, "count": len(results)})
+        return results
+
     def _meta(self) -> dict:
         return {
             "session_id":    self.memory.session_id,
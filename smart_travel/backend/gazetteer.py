@@ -0,0 +1,204 @@
+"""
+Gazetteer -
+
+Airport and city names for the intent classifier, loaded from a CSV:
+
+  iata,city,country,aliases        aliases separated by "|"
+
+  Gazetteer.spans(text)   leftmost-longest, word-bounded city names in a
+                          lowercased sentence, via a character trie
+  Gazetteer.lookup(name)  exact name or alias → IATA code
+  Gazetteer.fuzzy(name)   closest name within a few edits (BK-tree), for
+                          typos; None when the closest are different airports
+
+Lowercase IATA codes are only indexed when listed as aliases: with a full
+airport list, most three-letter words ("the", "for", "and") are codes.
+"""
+from __future__ import annotations
+import csv, itertools, os, re
+from functools import lru_cache
+from typing import Iterable, Optional
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "airports.csv")
+
+_WORD_START = re.compile(r'\b\w')
+_SPACES     = re.compile(r'\s+')
+_END        = ""            # trie key marking a complete name; never a character
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance, bit-parallel over `a` (Myers/Hyyrö): one pass of int ops per char of `b`."""
+    if not a or not b:
+        return len(a) or len(b)
+    peq: dict[str, int] = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | 1 << i
+    mask, top = (1 << len(a)) - 1, 1 << (len(a) - 1)
+    pv, mv, score = mask, 0, len(a)
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & top:
+            score += 1
+        elif mh & top:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def max_edits(name: str) -> int:
+    """
+    Typos tolerated in a name of this length. Short names must match
+    exactly: two edits turn most six-letter names into some other city.
+    """
+    n = len(name)
+    return 0 if n < 5 else 1 if n < 8 else 2
+
+
+def transposed(a: str, b: str) -> bool:
+    """True if swapping one pair of adjacent letters of `a` gives `b` ("dehli" / "delhi")."""
+    if len(a) != len(b):
+        return False
+    diff = [i for i in range(len(a)) if a[i] != b[i]]
+    return (len(diff) == 2 and diff[1] == diff[0] + 1
+            and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]])
+
+
+class BKTree:
+    """Burkhard-Keller tree: words within d edits of a query, pruned by the triangle inequality."""
+
+    def __init__(self, words: Iterable[str] = ()):
+        self._root: Optional[tuple[str, dict]] = None
+        for w in words:
+            self.add(w)
+
+    def add(self, word: str) -> None:
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node = self._root
+        while True:
+            d = levenshtein(word, node[0])
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = (word, {})
+                return
+            node = child
+
+    def search(self, word: str, max_dist: int) -> list[tuple[int, str]]:
+        """(distance, word) for every stored word within `max_dist` edits."""
+        found, stack = [], [self._root] if self._root else []
+        while stack:
+            w, children = stack.pop()
+            # Lengths alone bound the distance from below: a node too far
+            # off for itself and every child subtree is skipped unscored.
+            gap = abs(len(w) - len(word))
+            if gap > max_dist and (not children or gap > max_dist + max(children)):
+                continue
+            d = levenshtein(word, w)
+            if d <= max_dist:
+                found.append((d, w))
+            for k, child in children.items():
+                if d - max_dist <= k <= d + max_dist:
+                    stack.append(child)
+        return found
+
+
+class Gazetteer:
+    def __init__(self, rows: Iterable[tuple[str, str, str, Iterable[str]]]):
+        self.airports: dict[str, tuple[str, str]] = {}     # IATA → (city, country)
+        self._names:   dict[str, str] = {}                 # lowercased name → IATA
+        self._trie:    dict = {}
+        for code, city, country, aliases in rows:
+            code = code.strip().upper()
+            self.airports.setdefault(code, (city.strip(), country.strip()))
+            for name in (city, *aliases):
+                self._index(_SPACES.sub(" ", name.strip().lower()), code)
+        # Fuzzy matching skips names too short to tell from a typo of another.
+        self._bk = BKTree(n for n in self._names if len(n) >= 4)
+        # A miss walks a good part of the tree, and the same phrases recur.
+        self.fuzzy = lru_cache(maxsize=4096)(self._fuzzy)
+
+    def _index(self, name: str, code: str) -> None:
+        if not name or name in self._names:     # first row to claim a name keeps it
+            return
+        self._names[name] = code
+        node = self._trie
+        for ch in name:
+            node = node.setdefault(ch, {})
+        node[_END] = code
+
+    @classmethod
+    def load(cls, *paths: str) -> "Gazetteer":
+        """One or more CSVs, earlier files winning any name they share."""
+        return cls(itertools.chain.from_iterable(_read(p) for p in paths or (DEFAULT_PATH,)))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.airports
+
+    def lookup(self, name: str) -> Optional[str]:
+        return self._names.get(_SPACES.sub(" ", name.strip().lower()))
+
+    def spans(self, text: str) -> list[tuple[int, int, str]]:
+        """(start, end, IATA) for each city name in lowercased `text`; longest wins, no overlaps."""
+        found, pos, n = [], 0, len(text)
+        for m in _WORD_START.finditer(text):
+            i = m.start()
+            if i < pos:
+                continue
+            node, best = self._trie, None
+            for j in range(i, n):
+                node = node.get(text[j])
+                if node is None:
+                    break
+                if _END in node and (j + 1 == n or not _is_word(text[j + 1])):
+                    best = (j + 1, node[_END])
+            if best:
+                found.append((i, best[0], best[1]))
+                pos = best[0]
+        return found
+
+    def _fuzzy(self, name: str) -> Optional[str]:
+        """
+        IATA code of the nearest name within max_edits(name), counting a
+        swap of adjacent letters as one edit. None if there is no such name,
+        or if the nearest ones belong to different airports: a guess there
+        would send the user to a route they never asked for.
+        """
+        name = _SPACES.sub(" ", name.strip().lower())
+        if name in self._names:
+            return self._names[name]
+        k = max_edits(name)
+        if not k:
+            return None
+        # Levenshtein counts a swap as two edits; search that far and recount.
+        hits = [(1 if d == 2 and transposed(name, w) else d, w)
+                for d, w in self._bk.search(name, max(k, 2))]
+        hits = [(d, w) for d, w in hits if d <= k]
+        if not hits:
+            return None
+        best = min(d for d, _ in hits)
+        codes = {self._names[w] for d, w in hits if d == best}
+        return codes.pop() if len(codes) == 1 else None
+
+
+def _read(path: str) -> Iterable[tuple[str, str, str, list[str]]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            yield (r["iata"], r["city"], r.get("country") or "",
+                   [a for a in (r.get("aliases") or "").split("|") if a])
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
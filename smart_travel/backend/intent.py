@@ -6,12 +6,22 @@ to the current question. The classifier itself can't know which step we're
 in, so the orchestrator passes `awaiting_slot` to guide interpretation.
 """
 from __future__ import annotations
-import re
+import multiprocessing as mp
+import re, threading
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Optional
+from functools import cached_property
+from itertools import accumulate
+from typing import Callable, Optional, Sequence, Union
 
+from .gazetteer import Gazetteer
+from .keywords import KeywordMatcher
+from .metrics import CLASSIFY_CACHE
 
-@dataclass
+
+@dataclass(frozen=True)
 class IntentResult:
     intent:   str
     service:  Optional[str] = None
@@ -34,6 +44,18 @@ QUERY_KW   = {"ameniti","facilities","include","tell me about","cancellation","p
 SELECT_KW  = {"select","choose","pick","option","go with","take","i'll take","i want the",
                "the first","the second","the third","book option"}
 
+# Every set above is matched in one pass; classify() tests the bitmap.
+_KW = KeywordMatcher({
+    "flight": FLIGHT_KW, "hotel": HOTEL_KW, "resume": RESUME_KW,
+    "confirm": CONFIRM_KW, "cancel": CANCEL_KW, "help": HELP_KW,
+    "status": STATUS_KW, "update": UPDATE_KW, "query": QUERY_KW,
+    "select": SELECT_KW,
+})
+KW_FLIGHT, KW_HOTEL, KW_RESUME, KW_CONFIRM, KW_CANCEL = (
+    _KW.bits[n] for n in ("flight", "hotel", "resume", "confirm", "cancel"))
+KW_HELP, KW_STATUS, KW_UPDATE, KW_QUERY, KW_SELECT = (
+    _KW.bits[n] for n in ("help", "status", "update", "query", "select"))
+
 NUMBER_MAP = {
     "one":"1","two":"2","three":"3","four":"4","five":"5",
     "six":"6","seven":"7","eight":"8","nine":"9","ten":"10",
@@ -45,159 +67,268 @@ EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+\.\w+')
 PHONE_RE = re.compile(r'\+?[\d\s\-\(\)]{10,16}')
 NAME_RE  = re.compile(r'(?:my name is|name is|i am|i\'m|name)\s+([A-Za-z]+(?: [A-Za-z]+)+)', re.I)
 
-CITY_MAP = {
-    "new delhi":"DEL","delhi":"DEL","del":"DEL",
-    "mumbai":"BOM","bombay":"BOM","bom":"BOM",
-    "bangalore":"BLR","bengaluru":"BLR","blr":"BLR",
-    "hyderabad":"HYD","hyd":"HYD",
-    "chennai":"MAA","madras":"MAA","maa":"MAA",
-    "kolkata":"CCU","calcutta":"CCU","ccu":"CCU",
-    "goa":"GOA","panaji":"GOA","goa city":"GOA",
-    "pune":"PNQ","pnq":"PNQ",
-    "ahmedabad":"AMD","amd":"AMD",
-    "jaipur":"JAI","jai":"JAI",
-    "kochi":"COK","cochin":"COK","cok":"COK",
-    "lucknow":"LKO","lko":"LKO",
-    "bhopal":"BHO","bho":"BHO",
-    "varanasi":"VNS","vns":"VNS","banaras":"VNS",
-    "indore":"IDR","idr":"IDR",
-    "nagpur":"NAG","nag":"NAG",
-    "coimbatore":"CJB","cjb":"CJB",
-    "amritsar":"ATQ","atq":"ATQ",
-    "agra":"AGR","agr":"AGR",
-    "chandigarh":"IXC","ixc":"IXC",
-    "guwahati":"GAU","gau":"GAU",
-    "bhubaneswar":"BBI","bbi":"BBI",
-    "patna":"PAT","pat":"PAT",
-    "raipur":"RPR","rpr":"RPR",
-    "trichy":"TRZ","tiruchirappalli":"TRZ",
-    "visakhapatnam":"VTZ","vizag":"VTZ",
-}
+# City names come from the gazetteer (backend/data/airports.csv unless
+# use_gazetteer() swapped in a larger list at startup).
+_gazetteer = Gazetteer.load()
+
+
+def use_gazetteer(gazetteer: Gazetteer) -> None:
+    global _gazetteer
+    _gazetteer = gazetteer
+    _cache.clear()
+
+
+# ── Message analysis ──────────────────────────────────────────
+# Every pattern is compiled once; Message runs each at most once per text.
+_NUMBER_RE = re.compile(r'\b(' + '|'.join(map(re.escape, NUMBER_MAP)) + r')\b')
+CODE_RE    = re.compile(r'\b([A-Z]{3})\b')
+FROM_TO_RE = re.compile(r'from\s+(.+?)\s+to\s+(.+?)(?:\s+on|\s+for|\s+\d|,|$)')
+X_TO_Y_RE  = re.compile(r'(\w[\w\s]{1,20}?)\s+to\s+(\w[\w\s]{1,20})')
+INT_RE     = re.compile(r'\b(\d{1,2})\b')
+OPTION_RES = [re.compile(p) for p in (
+    r'option\s+(\d)',
+    r'(?:choose|select|pick|go with|take|book)\s+(?:option\s+)?(\d)',
+    r'(?:the\s+)?(\d)(?:st|nd|rd|th)?\s+(?:one|option|flight|hotel)',
+    r'\b(\d)\b',
+)]
+PAX_RE      = re.compile(r'(\d+)\s*(?:passenger|pax|person|people|travell?er|adult)', re.I)
+GUESTS_RE   = re.compile(r'(\d+)\s*(?:guest|person|people|adult|pax)', re.I)
+HAS_PAX_RE  = re.compile(r'passenger|pax|guest|person|people|travell', re.I)
+CHECKIN_RE  = re.compile(r'check.?in|arriving|arrival')
+CHECKOUT_RE = re.compile(r'check.?out|departing|departure|till|until|leaving')
+NON_DIGIT_RE = re.compile(r'\D')
+PLACE_RE     = re.compile(r'^[A-Za-z\s]{2,30}$')
+FULL_NAME_RE = re.compile(r'^[A-Za-z]+(?: [A-Za-z]+)+$')
+ONE_WORD_RE  = re.compile(r'^[A-Za-z]+$')
+
+
+def _fuzzy_city(text: str) -> Optional[str]:
+    # Only short, letters-only stretches are worth a typo-tolerant lookup.
+    if PLACE_RE.match(text) and len(text.split()) <= 3:
+        return _gazetteer.fuzzy(text)
+    return None
+
+
+class Message:
+    """
+    One user message, analysed on demand. Lowercasing, number-word
+    normalization, keyword scan, dates, cities and contact details are
+    each computed at most once and shared by classify() and every slot
+    extractor. Cached dicts are shared too: copy before mutating.
+    """
+
+    def __init__(self, text: str):
+        self.raw = text
+
+    @cached_property
+    def stripped(self) -> str:
+        return self.raw.strip()
 
+    @cached_property
+    def lower(self) -> str:
+        return self.raw.lower()
 
-def _norm(text: str) -> str:
-    t = text.lower().strip()
-    for w, n in NUMBER_MAP.items():
-        t = re.sub(rf'\b{w}\b', n, t)
-    return t
-
-
-def _city(text: str) -> Optional[str]:
-    t = text.lower()
-    for name in sorted(CITY_MAP, key=len, reverse=True):
-        if name in t:
-            return CITY_MAP[name]
-    m = re.search(r'\b([A-Z]{3})\b', text)
-    return m.group(1) if m else None
-
-
-def _city_pair(text: str) -> tuple[Optional[str], Optional[str]]:
-    t = text.lower()
-    # "from X to Y on ..."
-    m = re.search(r'from\s+(.+?)\s+to\s+(.+?)(?:\s+on|\s+for|\s+\d|,|$)', t)
-    if m:
-        o, d = _city(m.group(1)), _city(m.group(2))
-        if o and d: return o, d
-    # "X to Y"
-    m2 = re.search(r'(\w[\w\s]{1,20}?)\s+to\s+(\w[\w\s]{1,20})', t)
-    if m2:
-        o, d = _city(m2.group(1)), _city(m2.group(2))
-        if o and d: return o, d
-    return None, None
-
-
-def _extract_int(text: str) -> Optional[int]:
-    """Extract a bare integer from text (for slot filling)."""
-    t = _norm(text)
-    # Look for standalone integer
-    m = re.search(r'\b(\d{1,2})\b', t)
-    if m:
+    @cached_property
+    def norm(self) -> str:
+        """Lowercased, stripped, number words replaced by digits."""
+        return _NUMBER_RE.sub(lambda m: NUMBER_MAP[m.group(1)], self.lower.strip())
+
+    @cached_property
+    def n_words(self) -> int:
+        return len(self.norm.split())
+
+    @cached_property
+    def hits(self) -> int:
+        """Keyword-set bitmap of the normalized text (KW_* bits)."""
+        return _KW.scan(self.norm)
+
+    @cached_property
+    def dates(self) -> list[str]:
+        return DATE_RE.findall(self.raw)
+
+    @cached_property
+    def number(self) -> Optional[int]:
+        """A bare 1–99 integer (for slot filling), unless it is part of a date."""
+        m = INT_RE.search(self.norm)
+        if not m:
+            return None
         v = int(m.group(1))
-        # Reject if it looks like a year
-        if v < 1 or v > 99:
+        if v < 1 or v > 99:                      # looks like a year
             return None
-        # Reject if part of a date
-        dates = DATE_RE.findall(text)
-        date_str = " ".join(dates)
-        if m.group(1) in date_str:
+        if m.group(1) in " ".join(self.dates):
             return None
         return v
-    return None
 
+    @cached_property
+    def option_index(self) -> Optional[int]:
+        for pat in OPTION_RES:
+            m = pat.search(self.norm)
+            if m:
+                idx = int(m.group(1))
+                if 1 <= idx <= 9:
+                    return idx
+        return None
+
+    # ── Cities ────────────────────────────────────────────────
+
+    @cached_property
+    def city_spans(self) -> list[tuple[int, int, str]]:
+        """Known city names in the lowercased text: word-bounded, longest match first."""
+        return _gazetteer.spans(self.lower)
+
+    def city_between(self, start: int, end: int, fuzzy: bool = False) -> Optional[str]:
+        """
+        Code of the first city name lying wholly inside lower[start:end].
+        With `fuzzy`, failing that, of the name nearest to the whole stretch.
+        """
+        for s, e, code in self.city_spans:
+            if s >= start and e <= end:
+                return code
+        return _fuzzy_city(self.lower[start:end]) if fuzzy else None
+
+    @cached_property
+    def city(self) -> Optional[str]:
+        code = self.city_between(0, len(self.lower))
+        if code:
+            return code
+        m = CODE_RE.search(self.raw)
+        return m.group(1) if m else None
+
+    @cached_property
+    def fuzzy_city(self) -> Optional[str]:
+        """The whole message read as a possibly misspelt city name ("Mumbia")."""
+        return _fuzzy_city(self.stripped)
+
+    @cached_property
+    def city_pair(self) -> tuple[Optional[str], Optional[str]]:
+        # "from X to Y on ..." then "X to Y"; both read the lowercased text,
+        # so only city names (not bare IATA codes) can match here.
+        for rx in (FROM_TO_RE, X_TO_Y_RE):
+            m = rx.search(self.lower)
+            if m:
+                o = self.city_between(m.start(1), m.end(1), fuzzy=True)
+                d = self.city_between(m.start(2), m.end(2), fuzzy=True)
+                if o and d:
+                    return o, d
+        return None, None
+
+    # ── Contact details ───────────────────────────────────────
+
+    @cached_property
+    def email(self) -> Optional[str]:
+        em = EMAIL_RE.search(self.raw)
+        return em.group(0) if em else None
+
+    @cached_property
+    def phone(self) -> Optional[str]:
+        ph = PHONE_RE.search(self.raw)
+        if ph and len(NON_DIGIT_RE.sub('', ph.group(0))) >= 10:
+            return ph.group(0).strip()
+        return None
+
+    @cached_property
+    def name(self) -> Optional[str]:
+        nm = NAME_RE.search(self.raw)
+        return nm.group(1).strip() if nm else None
+
+    # ── Slot sets ─────────────────────────────────────────────
+
+    @cached_property
+    def flight_slots(self) -> dict:
+        slots = {}
+        o, d = self.city_pair
+        if o: slots["origin"] = o
+        if d: slots["destination"] = d
+        if self.dates: slots["travel_date"] = self.dates[0]
+        # Passengers: explicit word OR bare number (only if no city/date context)
+        pax_m = PAX_RE.search(self.raw)
+        if pax_m:
+            slots["passengers"] = pax_m.group(1)
+        return slots
+
+    @cached_property
+    def hotel_slots(self) -> dict:
+        slots = {}
+        has_checkin  = bool(CHECKIN_RE.search(self.lower))
+        has_checkout = bool(CHECKOUT_RE.search(self.lower))
 
-def _extract_dates(text: str) -> list[str]:
-    return DATE_RE.findall(text)
-
-
-def _option_index(text: str) -> Optional[int]:
-    t = _norm(text)
-    patterns = [
-        r'option\s+(\d)',
-        r'(?:choose|select|pick|go with|take|book)\s+(?:option\s+)?(\d)',
-        r'(?:the\s+)?(\d)(?:st|nd|rd|th)?\s+(?:one|option|flight|hotel)',
-        r'\b(\d)\b',
-    ]
-    for pat in patterns:
-        m = re.search(pat, t)
-        if m:
-            idx = int(m.group(1))
-            if 1 <= idx <= 9:
-                return idx
-    return None
+        if self.city: slots["city"] = self.city
 
+        dates = self.dates
+        if len(dates) >= 2:
+            slots["checkin_date"]  = dates[0]
+            slots["checkout_date"] = dates[1]
+        elif len(dates) == 1:
+            if has_checkout and not has_checkin:
+                slots["checkout_date"] = dates[0]
+            else:
+                slots["checkin_date"] = dates[0]
 
-def _flight_slots(text: str) -> dict:
-    slots = {}
-    o, d = _city_pair(text)
-    if o: slots["origin"] = o
-    if d: slots["destination"] = d
-    dates = _extract_dates(text)
-    if dates: slots["travel_date"] = dates[0]
-    # Passengers: explicit word OR bare number (only if no city/date context)
-    pax_m = re.search(r'(\d+)\s*(?:passenger|pax|person|people|travell?er|adult)', text, re.I)
-    if pax_m:
-        slots["passengers"] = pax_m.group(1)
-    return slots
+        guests_m = GUESTS_RE.search(self.raw)
+        if guests_m: slots["guests"] = guests_m.group(1)
 
+        return slots
 
-def _hotel_slots(text: str) -> dict:
-    slots = {}
-    t = text.lower()
-    has_checkin  = bool(re.search(r'check.?in|arriving|arrival', t))
-    has_checkout = bool(re.search(r'check.?out|departing|departure|till|until|leaving', t))
-
-    city_val = _city(text)
-    if city_val: slots["city"] = city_val
-
-    dates = _extract_dates(text)
-    if len(dates) >= 2:
-        slots["checkin_date"]  = dates[0]
-        slots["checkout_date"] = dates[1]
-    elif len(dates) == 1:
-        if has_checkout and not has_checkin:
-            slots["checkout_date"] = dates[0]
-        else:
-            slots["checkin_date"] = dates[0]
-
-    guests_m = re.search(r'(\d+)\s*(?:guest|person|people|adult|pax)', text, re.I)
-    if guests_m: slots["guests"] = guests_m.group(1)
+    @cached_property
+    def personal_slots(self) -> dict:
+        slots = {}
+        if self.email: slots["email"] = self.email
+        if self.name:  slots["name"]  = self.name
+        if self.phone: slots["phone"] = self.phone
+        return slots
 
-    return slots
 
+# ── Result cache ──────────────────────────────────────────────
 
-def _personal_slots(text: str) -> dict:
-    slots = {}
-    em = EMAIL_RE.search(text)
-    if em: slots["email"] = em.group(0)
-    nm = NAME_RE.search(text)
-    if nm: slots["name"] = nm.group(1).strip()
-    ph = PHONE_RE.search(text)
-    if ph:
-        candidate = ph.group(0).strip()
-        digits = re.sub(r'\D', '', candidate)
-        if len(digits) >= 10:
-            slots["phone"] = candidate
-    return slots
+class ClassifyCache:
+    """
+    LRU of classify() results keyed on (stripped text, awaiting_slot).
+    Much of the traffic is the same few short replies ("yes", "option 1",
+    "2"); texts longer than `max_text` are not worth a slot and skip it.
+    """
+
+    def __init__(self, max_size: int, max_text: int = 256):
+        self.max_size = max_size
+        self.max_text = max_text
+        self.hits     = 0
+        self.misses   = 0
+        self._entries: OrderedDict[tuple, IntentResult] = OrderedDict()
+        self._lock    = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[IntentResult]:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        CLASSIFY_CACHE.inc("miss" if hit is None else "hit")
+        return hit
+
+    def put(self, key: tuple, result: IntentResult) -> None:
+        if self.max_size <= 0 or len(key[0]) > self.max_text:
+            return
+        with self._lock:
+            self._entries[key] = result
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = ClassifyCache(10_000)
+
+
+def use_cache(max_size: int) -> None:
+    """Replace the classify() cache with one of `max_size` entries; 0 disables it."""
+    global _cache
+    _cache = ClassifyCache(max_size)
 
 
 # ── Main classifier ───────────────────────────────────────────
@@ -209,140 +340,301 @@ def classify(text: str, awaiting_slot: Optional[str] = None) -> IntentResult:
     awaiting_slot: If set, we are mid-collection and a bare value
                    should be interpreted as filling this slot.
                    e.g. awaiting_slot="passengers" → "4" fills passengers
+
+    Surrounding whitespace is ignored. Repeated messages are answered
+    from the cache; every call gets its own slots dict and `raw`, so
+    callers cannot change what later calls see.
     """
-    t = _norm(text)
-    raw = text
+    key = (text.strip(), awaiting_slot)
+    hit = _cache.get(key)
+    if hit is None:
+        hit = _classify(*key)
+        _cache.put(key, hit)
+    return IntentResult(hit.intent, hit.service, dict(hit.slots), text)
+
+
+def _classify(text: str, awaiting_slot: Optional[str]) -> IntentResult:
+    return _decide(Message(text), awaiting_slot)
+
+
+# Classifier engines by name; TravelEngine.classifier picks one. Others
+# (e.g. backend.ngram) are registered at startup when configured.
+ENGINES: dict[str, Callable[[str, Optional[str]], IntentResult]] = {"rules": classify}
+
+
+def _decide(m: Message, awaiting_slot: Optional[str]) -> IntentResult:
+    raw = m.raw
+    hits = m.hits
 
     # ── Hard commands ─────────────────────────────────────────
-    if any(k in t for k in HELP_KW) and len(t.split()) <= 3:
+    if hits & KW_HELP and m.n_words <= 3:
         return IntentResult("help", raw=raw)
-    if any(k in t for k in STATUS_KW):
+    if hits & KW_STATUS:
         return IntentResult("status", raw=raw)
 
     # ── Resume ────────────────────────────────────────────────
-    if any(k in t for k in RESUME_KW):
-        svc = None
-        if any(k in t for k in FLIGHT_KW): svc = "flight"
-        if any(k in t for k in HOTEL_KW):  svc = "hotel"
-        return IntentResult("resume", service=svc, raw=raw)
+    if hits & KW_RESUME:
+        return IntentResult("resume", service=_resume_service(hits), raw=raw)
 
     # ── Cancel ────────────────────────────────────────────────
-    if any(k in t for k in CANCEL_KW) and len(t.split()) <= 4:
+    if hits & KW_CANCEL and m.n_words <= 4:
         return IntentResult("cancel", raw=raw)
 
     # ── Confirm ───────────────────────────────────────────────
-    if any(k in t for k in CONFIRM_KW) and len(t.split()) <= 5:
+    if hits & KW_CONFIRM and m.n_words <= 5:
         return IntentResult("confirm", raw=raw)
 
     # ── Query about offer details ─────────────────────────────
-    if any(k in t for k in QUERY_KW):
-        idx = _option_index(raw)
+    if hits & KW_QUERY:
+        idx = m.option_index
         return IntentResult("query_offer", slots={"index": idx}, raw=raw)
 
     # ── Service detection ─────────────────────────────────────
-    is_flight = any(k in t for k in FLIGHT_KW)
-    is_hotel  = any(k in t for k in HOTEL_KW)
+    is_flight = bool(hits & KW_FLIGHT)
+    is_hotel  = bool(hits & KW_HOTEL)
 
     # ── CONTEXT-AWARE SLOT FILL ───────────────────────────────
     # If we're awaiting a specific slot, treat bare values as that slot
     if awaiting_slot:
-        slots = {}
-
-        # Personal details slots
-        personal = _personal_slots(raw)
-        if personal:
-            return IntentResult("provide_info", slots=personal, raw=raw)
-
-        # Bare number → fill the awaiting numeric slot
-        num = _extract_int(text)
-        if num is not None and awaiting_slot in ("passengers", "guests"):
-            return IntentResult("provide_info",
-                                slots={awaiting_slot: str(num)}, raw=raw)
-
-        # Date → fill date slot
-        dates = _extract_dates(text)
-        if dates and awaiting_slot in ("travel_date", "checkin_date", "checkout_date"):
-            return IntentResult("provide_info",
-                                slots={awaiting_slot: dates[0]}, raw=raw)
-
-        # City → fill city slot
-        city = _city(text)
-        if city and awaiting_slot in ("origin", "destination", "city"):
-            return IntentResult("provide_info",
-                                slots={awaiting_slot: city}, raw=raw)
-
-        # Also try raw text as city name for unknown cities
-        if awaiting_slot in ("origin", "destination", "city"):
-            # Could be an unknown city name
-            if re.match(r'^[A-Za-z\s]{2,30}$', raw.strip()):
-                return IntentResult("provide_info",
-                                    slots={awaiting_slot: raw.strip().title()}, raw=raw)
-
-        # Bare name → fill name slot
-        if awaiting_slot == "name":
-            # If it looks like a person name (2+ words, letters only)
-            if re.match(r'^[A-Za-z]+(?: [A-Za-z]+)+$', raw.strip()):
-                return IntentResult("provide_info",
-                                    slots={"name": raw.strip()}, raw=raw)
-            # Also: name might have "is" - handle "Rahul Verma" directly
-            if re.match(r'^[A-Za-z]+$', raw.strip()):  # single word name
-                return IntentResult("provide_info",
-                                    slots={"name": raw.strip()}, raw=raw)
-
-        # Bare email
-        if awaiting_slot == "email":
-            em = EMAIL_RE.search(raw)
-            if em:
-                return IntentResult("provide_info", slots={"email": em.group(0)}, raw=raw)
-
-        # Bare phone
-        if awaiting_slot == "phone":
-            ph = PHONE_RE.search(raw)
-            if ph:
-                digits = re.sub(r'\D', '', ph.group(0))
-                if len(digits) >= 10:
-                    return IntentResult("provide_info", slots={"phone": ph.group(0).strip()}, raw=raw)
+        slots = _awaiting_slots(m, awaiting_slot)
+        if slots:
+            return IntentResult("provide_info", slots=slots, raw=raw)
 
     # ── Update / change param ─────────────────────────────────
-    if any(k in t for k in UPDATE_KW):
-        slots: dict = {}
-        if is_flight or not is_hotel:
-            slots.update(_flight_slots(raw))
-        if is_hotel or not is_flight:
-            for k, v in _hotel_slots(raw).items():
-                if k not in slots: slots[k] = v
-        slots.update(_personal_slots(raw))
+    if hits & KW_UPDATE:
         svc = "flight" if is_flight else ("hotel" if is_hotel else None)
-        return IntentResult("update_param", service=svc, slots=slots, raw=raw)
+        return IntentResult("update_param", service=svc, slots=_update_slots(m), raw=raw)
 
     # ── Option selection ──────────────────────────────────────
-    has_pax = bool(re.search(r'passenger|pax|guest|person|people|travell', t, re.I))
-    idx = _option_index(raw)
+    has_pax = bool(HAS_PAX_RE.search(m.norm))
+    idx = m.option_index
     if idx and not has_pax and not is_flight and not is_hotel:
-        if any(k in t for k in SELECT_KW | {"option"}):
+        if hits & KW_SELECT:
             return IntentResult("select_offer", slots={"index": idx}, raw=raw)
-        if len(t.split()) <= 2:
+        if m.n_words <= 2:
             return IntentResult("select_offer", slots={"index": idx}, raw=raw)
 
     # ── Flight search intent ──────────────────────────────────
     if is_flight and not is_hotel:
-        slots = _flight_slots(raw)
-        slots.update(_personal_slots(raw))
+        slots = dict(m.flight_slots)
+        slots.update(m.personal_slots)
         return IntentResult("search_flight", service="flight", slots=slots, raw=raw)
 
     # ── Hotel search intent ───────────────────────────────────
     if is_hotel and not is_flight:
-        slots = _hotel_slots(raw)
-        slots.update(_personal_slots(raw))
+        slots = dict(m.hotel_slots)
+        slots.update(m.personal_slots)
         return IntentResult("search_hotel", service="hotel", slots=slots, raw=raw)
 
     # ── General info provision ────────────────────────────────
-    slots = {}
-    slots.update(_flight_slots(raw))
-    for k, v in _hotel_slots(raw).items():
-        if k not in slots: slots[k] = v
-    slots.update(_personal_slots(raw))
+    slots = _info_slots(m)
     if slots:
         return IntentResult("provide_info", slots=slots, raw=raw)
 
     return IntentResult("unknown", raw=raw)
+
+
+# ── Slot builders (shared with other classifier engines) ──────
+
+def _resume_service(hits: int) -> Optional[str]:
+    svc = None
+    if hits & KW_FLIGHT: svc = "flight"
+    if hits & KW_HOTEL:  svc = "hotel"
+    return svc
+
+
+def _awaiting_slots(m: Message, awaiting_slot: str) -> Optional[dict]:
+    """The message read as the answer to `awaiting_slot`, if it is one."""
+    # Personal details slots
+    if m.personal_slots:
+        return dict(m.personal_slots)
+
+    # Bare number → fill the awaiting numeric slot
+    num = m.number
+    if num is not None and awaiting_slot in ("passengers", "guests"):
+        return {awaiting_slot: str(num)}
+
+    # Date → fill date slot
+    dates = m.dates
+    if dates and awaiting_slot in ("travel_date", "checkin_date", "checkout_date"):
+        return {awaiting_slot: dates[0]}
+
+    # City → fill city slot, allowing for a typo in a bare city reply
+    if awaiting_slot in ("origin", "destination", "city"):
+        city = m.city or m.fuzzy_city
+        if city:
+            return {awaiting_slot: city}
+
+    # Also try raw text as city name for unknown cities
+    if awaiting_slot in ("origin", "destination", "city"):
+        # Could be an unknown city name
+        if PLACE_RE.match(m.stripped):
+            return {awaiting_slot: m.stripped.title()}
+
+    # Bare name → fill name slot
+    if awaiting_slot == "name":
+        # If it looks like a person name (2+ words, letters only)
+        if FULL_NAME_RE.match(m.stripped):
+            return {"name": m.stripped}
+        # Also: name might have "is" - handle "Rahul Verma" directly
+        if ONE_WORD_RE.match(m.stripped):  # single word name
+            return {"name": m.stripped}
+
+    # Bare email
+    if awaiting_slot == "email":
+        if m.email:
+            return {"email": m.email}
+
+    # Bare phone
+    if awaiting_slot == "phone":
+        if m.phone:
+            return {"phone": m.phone}
+    return None
+
+
+def _update_slots(m: Message) -> dict:
+    is_flight = bool(m.hits & KW_FLIGHT)
+    is_hotel  = bool(m.hits & KW_HOTEL)
+    slots: dict = {}
+    if is_flight or not is_hotel:
+        slots.update(m.flight_slots)
+    if is_hotel or not is_flight:
+        for k, v in m.hotel_slots.items():
+            if k not in slots: slots[k] = v
+    slots.update(m.personal_slots)
+    return slots
+
+
+def _info_slots(m: Message) -> dict:
+    slots = {}
+    slots.update(m.flight_slots)
+    for k, v in m.hotel_slots.items():
+        if k not in slots: slots[k] = v
+    slots.update(m.personal_slots)
+    return slots
+
+
+def extract(m: Message, intent: str, awaiting_slot: Optional[str] = None) -> IntentResult:
+    """
+    Service and slots for an intent decided elsewhere (another classifier
+    engine), filled by the same extractors the rules use.
+    """
+    hits, raw = m.hits, m.raw
+    if intent == "resume":
+        return IntentResult(intent, service=_resume_service(hits), raw=raw)
+    if intent in ("query_offer", "select_offer"):
+        return IntentResult(intent, slots={"index": m.option_index}, raw=raw)
+    if intent == "update_param":
+        svc = "flight" if hits & KW_FLIGHT else ("hotel" if hits & KW_HOTEL else None)
+        return IntentResult(intent, service=svc, slots=_update_slots(m), raw=raw)
+    if intent in ("search_flight", "search_hotel"):
+        service = intent[7:]
+        slots = dict(m.flight_slots if service == "flight" else m.hotel_slots)
+        slots.update(m.personal_slots)
+        return IntentResult(intent, service=service, slots=slots, raw=raw)
+    if intent == "provide_info":
+        slots = awaiting_slot and _awaiting_slots(m, awaiting_slot)
+        return IntentResult(intent, slots=slots or _info_slots(m), raw=raw)
+    return IntentResult(intent, raw=raw)
+
+
+# ── Bulk classification ───────────────────────────────────────
+
+@dataclass
+class IntentTable:
+    """
+    classify_many() output, one list per IntentResult field; row i is texts[i].
+    Rows with the same text and awaiting_slot share one slots dict: read-only.
+    """
+    intent:  list[str]
+    service: list[Optional[str]]
+    slots:   list[dict]
+    raw:     list[str]
+
+    def __len__(self) -> int:
+        return len(self.intent)
+
+    def __getitem__(self, i: int) -> IntentResult:
+        return IntentResult(self.intent[i], self.service[i], dict(self.slots[i]), self.raw[i])
+
+    def counts(self) -> Counter:
+        return Counter(self.intent)
+
+
+_SEP = "\x00"      # joins texts for the corpus-wide passes; a non-word char to every pattern
+
+
+def _analyse(texts: list[str]) -> list[Message]:
+    """
+    Messages for `texts` with the pieces most branches need — normalized
+    text, keyword hits, dates — computed by whole-corpus passes instead of
+    per message. Falls back to lazy per-message analysis if a text
+    contains the separator.
+    """
+    msgs = [Message(t) for t in texts]
+    if not texts or any(_SEP in t for t in texts):
+        return msgs
+    # One regex substitution for number words over all lowercased texts.
+    lowered = _SEP.join(texts).lower()
+    norms = [n.strip() for n in
+             _NUMBER_RE.sub(lambda m: NUMBER_MAP[m.group(1)], lowered).split(_SEP)]
+    hits = _KW.scan_many(norms)
+    # One date scan, matches assigned back to their text by offset.
+    joined = _SEP.join(texts)
+    starts = list(accumulate((len(t) + 1 for t in texts[:-1]), initial=0))
+    dates: list[list[str]] = [[] for _ in texts]
+    for d in DATE_RE.finditer(joined):
+        dates[bisect_right(starts, d.start()) - 1].append(d.group(1))
+    for m, n, h, ds in zip(msgs, norms, hits, dates):
+        m.__dict__.update(norm=n, hits=h, dates=ds)
+    return msgs
+
+
+def _classify_chunk(keys: list[tuple[str, Optional[str]]]) -> list[tuple]:
+    msgs = _analyse([t for t, _ in keys])
+    out = []
+    for m, (_, slot) in zip(msgs, keys):
+        r = _decide(m, slot)
+        out.append((r.intent, r.service, r.slots))
+    return out
+
+
+def classify_many(texts: Sequence[str],
+                  awaiting_slots: Union[None, str, Sequence[Optional[str]]] = None,
+                  processes: int = 0, chunk_size: int = 5_000) -> IntentTable:
+    """
+    classify() over a corpus, e.g. historical logs after a keyword change.
+
+    awaiting_slots: one per text, or a single value for all of them.
+    processes:      above 1, distinct messages are classified in that many
+                    worker processes, `chunk_size` at a time.
+
+    Each distinct (text, awaiting_slot) pair is classified once. The
+    online result cache is neither read nor filled.
+    """
+    n = len(texts)
+    if awaiting_slots is None or isinstance(awaiting_slots, str):
+        awaiting_slots = [awaiting_slots] * n
+    elif len(awaiting_slots) != n:
+        raise ValueError(f"{len(awaiting_slots)} awaiting_slots for {n} texts")
+
+    index: dict[tuple, int] = {}
+    rows = [index.setdefault((t.strip(), s), len(index)) for t, s in zip(texts, awaiting_slots)]
+    keys = list(index)
+    chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+
+    if processes > 1 and len(chunks) > 1:
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else "spawn")
+        with ProcessPoolExecutor(processes, mp_context=ctx) as pool:
+            parts = list(pool.map(_classify_chunk, chunks))
+    else:
+        parts = [_classify_chunk(c) for c in chunks]
+    results = [r for part in parts for r in part]
+
+    return IntentTable(
+        intent  = [results[r][0] for r in rows],
+        service = [results[r][1] for r in rows],
+        slots   = [results[r][2] for r in rows],
+        raw     = list(texts),
+    )
@@ -0,0 +1,409 @@
+"""
+Inventory -
+
+The flights and hotels behind api.search_flights() / search_hotels(),
+loaded from CSV:
+
+  data/airlines.csv   code,name,cabin,refundable,cancellation_policy,baggage
+  data/flights.csv    airline,number,origin,destination,departure,arrival,
+                      days,stops,cabin,base,taxes,seats,rating
+  data/hotels.csv     id,city,name,stars,location,room_type,price_per_night,
+                      rating,reviews,breakfast_included,cancellation_policy,
+                      amenities,highlights,rooms      (lists "|"-separated)
+
+A leg operates on the ISO weekdays in `days` ("1234567" = daily, "135" =
+Mon/Wed/Fri); `seats` is what each departure has free. Legs are kept
+column by column in typed arrays, and indexed by route and weekday, so a
+search is one dict lookup and then only touches the legs flying that
+route that day — the same cost for a schedule of a thousand legs or of
+a million.
+
+Hotels are kept the same way and indexed by city, each city sorted three
+ways (price, stars, rating), so "4+ stars under ₹8,000 by rating" reads
+one bisected run of one index rather than the whole city.
+
+Offers are built only for matches: a shared read-only record per leg or
+hotel (models.record) plus the per-search fare, dates and counts. The
+inventory is read-only: seat and room counts are the loaded figures.
+"""
+from __future__ import annotations
+import csv, heapq, os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Iterable, Mapping, Optional
+
+from .models import Offer, record
+
+DATA_DIR         = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_FLIGHTS  = os.path.join(DATA_DIR, "flights.csv")
+DEFAULT_AIRLINES = os.path.join(DATA_DIR, "airlines.csv")
+DEFAULT_HOTELS   = os.path.join(DATA_DIR, "hotels.csv")
+
+_NO_LEGS      = array("I")
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y")
+
+
+@lru_cache(maxsize=1024)
+def parse_date(text: str) -> Optional[date]:
+    """A travel date as the classifier extracts it (ISO first, then day/month/year)."""
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class FlightInventory:
+    def __init__(self, airlines: Iterable[Mapping[str, str]], legs: Iterable[Mapping[str, str]]):
+        # Fare rules: one row per airline and cabin; legs refer to them by position.
+        self._rules: list[tuple] = []
+        rule_of: dict[tuple[str, str], int] = {}
+        for a in airlines:
+            rule_of[a["code"], a["cabin"]] = len(self._rules)
+            self._rules.append((a["code"], a["name"], a["cabin"], a["refundable"].strip().lower() in ("yes", "true", "1"),
+                                a["cancellation_policy"], a["baggage"]))
+
+        # ── Columns ───────────────────────────────────────────
+        self._routes:  list[tuple[str, str]] = []
+        route_of: dict[tuple[str, str], int] = {}
+        self._route    = array("I")     # → self._routes
+        self._rule     = array("H")     # → self._rules
+        self._number   = array("H")
+        self._dep      = array("H")     # minutes after midnight
+        self._arr      = array("H")
+        self._days     = array("B")     # bit d-1 set → operates on ISO weekday d
+        self._stops    = array("B")
+        self._base     = array("I")
+        self._taxes    = array("I")
+        self._seats    = array("H")
+        self._rating   = array("B")     # tenths
+        masks: dict[str, int] = {}
+        for leg in legs:
+            key = leg["airline"], leg.get("cabin") or "Economy"
+            if key not in rule_of:
+                raise ValueError(f"no airlines.csv row for {key[0]} {key[1]}")
+            route = leg["origin"].upper(), leg["destination"].upper()
+            if route not in route_of:
+                route_of[route] = len(self._routes)
+                self._routes.append(route)
+            self._route.append(route_of[route])
+            self._rule.append(rule_of[key])
+            self._number.append(int(leg["number"]))
+            self._dep.append(_minutes(leg["departure"]))
+            self._arr.append(_minutes(leg["arrival"]))
+            days = leg.get("days") or "1234567"
+            if days not in masks:
+                masks[days] = sum(1 << (int(d) - 1) for d in set(days))
+            self._days.append(masks[days])
+            self._stops.append(int(leg.get("stops") or 0))
+            self._base.append(int(leg["base"]))
+            self._taxes.append(int(leg["taxes"]))
+            self._seats.append(int(leg["seats"]))
+            self._rating.append(round(float(leg.get("rating") or 0) * 10))
+
+        # ── Index: (origin, destination) → legs per weekday, by departure ──
+        weekdays = {m: [wd for wd in range(7) if m >> wd & 1] for m in set(self._days)}
+        route, dep, mask = self._route, self._dep, self._days
+        by_route: list = [None] * len(self._routes)
+        for i in sorted(range(len(route)), key=lambda i: route[i] << 11 | dep[i]):
+            days = by_route[route[i]]
+            if days is None:
+                days = by_route[route[i]] = tuple(array("I") for _ in range(7))
+            for wd in weekdays[mask[i]]:
+                days[wd].append(i)
+        # Routes flown only some days share one empty array for the others.
+        self._index: dict[tuple[str, str], tuple[array, ...]] = {
+            r: tuple(a or _NO_LEGS for a in days) for r, days in zip(self._routes, by_route) if days}
+
+        self._records: dict[int, Mapping] = {}               # built on first match
+
+    @classmethod
+    def load(cls, flights: str = DEFAULT_FLIGHTS, airlines: str = DEFAULT_AIRLINES) -> "FlightInventory":
+        with open(airlines, newline="", encoding="utf-8") as fa, \
+             open(flights, newline="", encoding="utf-8") as ff:
+            return cls(csv.DictReader(fa), csv.DictReader(ff))
+
+    def __len__(self) -> int:
+        return len(self._route)
+
+    def routes(self) -> list[tuple[str, str]]:
+        return list(self._index)
+
+    # ── Search ────────────────────────────────────────────────
+
+    def legs(self, origin: str, destination: str, day: date) -> array:
+        """Legs flying the route on that weekday, by departure time."""
+        days = self._index.get((origin.upper(), destination.upper()))
+        return days[day.weekday()] if days else _NO_LEGS
+
+    def search(self, origin: str, destination: str, travel_date: str, passengers: int = 1,
+               limit: Optional[int] = None) -> list[Offer]:
+        """Bookable offers for `passengers`, cheapest first (then by departure)."""
+        day = parse_date(travel_date)
+        if day is None:
+            return []
+        legs  = self.legs(origin, destination, day)
+        base, taxes, seats = self._base, self._taxes, self._seats
+        fares = [base[i] + taxes[i] for i in legs]
+        # Sorting by fare is stable, so equal fares stay in departure order.
+        found = sorted((k for k in range(len(legs)) if seats[legs[k]] >= passengers), key=fares.__getitem__)
+        if limit is not None:
+            found = found[:limit]
+        offers = []
+        for k in found:
+            i = legs[k]
+            offers.append(Offer(self._record(i), {
+                # Scale total by passenger count
+                "fare":       {"base": base[i], "taxes": taxes[i],
+                               "total": fares[k] * passengers, "per_person": fares[k]},
+                "seats_left": seats[i],
+                "date":       day.isoformat(),
+                "passengers": passengers,
+            }))
+        return offers
+
+    def _record(self, i: int) -> Mapping:
+        rec = self._records.get(i)
+        if rec is None:
+            code, name, cabin, refundable, policy, baggage = self._rules[self._rule[i]]
+            origin, destination = self._routes[self._route[i]]
+            dep, arr, stops = self._dep[i], self._arr[i], self._stops[i]
+            mins = (arr - dep) % 1440
+            rec = self._records[i] = record({
+                "id":                  f"{code}-{self._number[i]}-{origin}{destination}",
+                "airline":             name,
+                "airline_code":        code,
+                "flight_no":           f"{code}-{self._number[i]}",
+                "origin":              origin,
+                "destination":         destination,
+                "departure":           _clock(dep),
+                "arrival":             _clock(arr),
+                "duration":            f"{mins // 60}h {mins % 60:02d}m",
+                "stops":               stops,
+                "stops_label":         "Non-stop" if not stops else f"{stops} stop{'s' if stops > 1 else ''}",
+                "currency":            "INR",
+                "class":               cabin,
+                "refundable":          refundable,
+                "cancellation_policy": policy,
+                "baggage":             baggage,
+                "rating":              self._rating[i] / 10,
+            })
+        return rec
+
+
+# ── Hotels ────────────────────────────────────────────────────
+# Each city keeps its hotels in three orders, best first: cheapest,
+# most stars, best rated. An order is (keys, hotels) with keys ascending,
+# so a filter on that field is a bisect to one contiguous run.
+_ORDERS = ("price", "stars", "rating")
+
+
+class HotelInventory:
+    def __init__(self, hotels: Iterable[Mapping[str, str]]):
+        # ── Columns (repeated strings are stored once and referred to) ──
+        self._cities:  list[str] = []
+        city_of: dict[str, int] = {}
+        self._pool:    list = []
+        pool_of: dict = {}
+
+        def pooled(value) -> int:
+            if value not in pool_of:
+                pool_of[value] = len(self._pool)
+                self._pool.append(value)
+            return pool_of[value]
+
+        self._id        = []
+        self._name      = []
+        self._location  = array("I")    # → self._pool, likewise the next four
+        self._room_type = array("I")
+        self._policy    = array("I")
+        self._amenities = array("I")
+        self._highlights = array("I")
+        self._city      = array("H")    # → self._cities
+        self._stars     = array("B")
+        self._price     = array("I")
+        self._rating    = array("B")    # tenths
+        self._reviews   = array("I")
+        self._breakfast = array("B")
+        self._rooms     = array("H")    # rooms of the listed type
+        for h in hotels:
+            city = h["city"].strip().upper()
+            if city not in city_of:
+                city_of[city] = len(self._cities)
+                self._cities.append(city)
+            self._city.append(city_of[city])
+            self._id.append(h["id"])
+            self._name.append(h["name"])
+            self._location.append(pooled(h.get("location") or ""))
+            self._room_type.append(pooled(h.get("room_type") or "Standard Room"))
+            self._policy.append(pooled(h.get("cancellation_policy") or ""))
+            self._amenities.append(pooled(tuple(a for a in (h.get("amenities") or "").split("|") if a)))
+            self._highlights.append(pooled(tuple(a for a in (h.get("highlights") or "").split("|") if a)))
+            self._stars.append(int(h["stars"]))
+            self._price.append(int(h["price_per_night"]))
+            self._rating.append(round(float(h.get("rating") or 0) * 10))
+            self._reviews.append(int(h.get("reviews") or 0))
+            self._breakfast.append((h.get("breakfast_included") or "").strip().lower() in ("yes", "true", "1"))
+            self._rooms.append(int(h.get("rooms") or 10))
+
+        # ── Indexes: city → order → (keys, hotels) ──
+        by_city: list[list[int]] = [[] for _ in self._cities]
+        for i, c in enumerate(self._city):
+            by_city[c].append(i)
+        self._index: dict[str, dict[str, tuple[array, array]]] = {}
+        for city, rows in zip(self._cities, by_city):
+            orders = {}
+            for order in _ORDERS:
+                key = self._sort_key(order)
+                rows = sorted(rows, key=key)
+                orders[order] = (array("i", (key(i)[0] for i in rows)), array("I", rows))
+            self._index[city] = orders
+
+        self._records: dict[int, Mapping] = {}               # built on first match
+
+    def _sort_key(self, order: str):
+        price, stars, rating = self._price, self._stars, self._rating
+        if order == "price":
+            return lambda i: (price[i], -rating[i], i)
+        if order == "stars":
+            return lambda i: (-stars[i], -rating[i], price[i], i)
+        if order == "rating":
+            return lambda i: (-rating[i], price[i], i)
+        raise ValueError(f"unknown sort {order!r}; expected one of {', '.join(_ORDERS)}")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_HOTELS) -> "HotelInventory":
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(csv.DictReader(f))
+
+    def __len__(self) -> int:
+        return len(self._id)
+
+    def cities(self) -> list[str]:
+        return list(self._index)
+
+    # ── Search ────────────────────────────────────────────────
+
+    def query(self, city: str, *, min_price: Optional[int] = None, max_price: Optional[int] = None,
+              min_stars: Optional[int] = None, max_stars: Optional[int] = None,
+              min_rating: Optional[float] = None, sort: str = "price",
+              limit: Optional[int] = None, available=None) -> list[int]:
+        """
+        Hotels in `city` within the bounds, best first by `sort` ("price" =
+        cheapest, "stars" / "rating" = highest). Only one filtered run of one
+        index is read: the narrowest, or the sort order's own when reading it
+        until `limit` matches looks cheaper. `available(i)` is an extra test.
+        """
+        orders = self._index.get(city.strip().upper())
+        if orders is None:
+            return []
+        key = self._sort_key(sort)
+        plo = min_price if min_price is not None else 0
+        phi = max_price if max_price is not None else 1 << 32
+        slo = min_stars if min_stars is not None else 0
+        shi = max_stars if max_stars is not None else 255
+        rlo = round(min_rating * 10) if min_rating is not None else 0
+        # Bounds in each index's key space (stars and rating are stored negated).
+        bounds = {"price":  (min_price, max_price),
+                  "stars":  (None if max_stars is None else -max_stars,
+                             None if min_stars is None else -min_stars),
+                  "rating": (None, None if min_rating is None else -rlo)}
+        runs = {}
+        for order, (lo, hi) in bounds.items():
+            if order == sort or lo is not None or hi is not None:
+                keys = orders[order][0]
+                runs[order] = (bisect_left(keys, lo) if lo is not None else 0,
+                               bisect_right(keys, hi) if hi is not None else len(keys))
+
+        # Read the narrowest run and sort what passes, or stream the sort order
+        # and stop at `limit` — about limit / selectivity reads, taking the
+        # other filters as independent.
+        size  = {o: stop - start for o, (start, stop) in runs.items()}
+        total = len(orders[sort][0]) or 1
+        narrowest = min(runs, key=lambda o: (size[o], o != sort))
+        stream = size[sort]
+        if limit is not None:
+            selectivity = 1.0
+            for o in runs:
+                if o != sort:
+                    selectivity *= size[o] / total
+            stream = min(stream, limit / max(selectivity, 1 / total))
+
+        price, stars, rating = self._price, self._stars, self._rating
+        if stream <= size[narrowest]:
+            # Correlated filters (cheapest first, 5 stars only) can make that
+            # guess far too low: past the narrowest run's length, give up.
+            start, stop = runs[sort]
+            budget = size[narrowest] if narrowest != sort else stop - start
+            found  = []
+            for n, i in enumerate(memoryview(orders[sort][1])[start:stop]):
+                if n >= budget:
+                    break
+                if (plo <= price[i] <= phi and slo <= stars[i] <= shi and rating[i] >= rlo
+                        and (available is None or available(i))):
+                    found.append(i)
+                    if len(found) == limit:
+                        return found
+            else:
+                return found
+        start, stop = runs[narrowest]
+        found = [i for i in memoryview(orders[narrowest][1])[start:stop]
+                 if plo <= price[i] <= phi and slo <= stars[i] <= shi and rating[i] >= rlo]
+        if available is not None:
+            found = [i for i in found if available(i)]
+        return heapq.nsmallest(limit, found, key=key) if limit is not None else sorted(found, key=key)
+
+    def search(self, city: str, checkin: str, checkout: str, guests: int = 1, rooms: int = 1,
+               **filters) -> list[Offer]:
+        """Offers with at least `rooms` rooms; `filters` as for query()."""
+        ci, co = parse_date(checkin), parse_date(checkout)
+        if ci is None or co is None:
+            return []
+        nights = max(1, (co - ci).days)
+        count  = self._rooms
+        available = (lambda i: count[i] >= rooms) if rooms > 1 else None
+        offers = []
+        for i in self.query(city, available=available, **filters):
+            offers.append(Offer(self._record(i), {
+                "city":        city.strip().upper(),
+                "checkin":     ci.isoformat(),
+                "checkout":    co.isoformat(),
+                "nights":      nights,
+                "guests":      guests,
+                "total_price": self._price[i] * nights * rooms,
+                "rooms_left":  count[i],
+            }))
+        return offers
+
+    def _record(self, i: int) -> Mapping:
+        rec = self._records.get(i)
+        if rec is None:
+            pool = self._pool
+            rec = self._records[i] = record({
+                "id":                  self._id[i],
+                "name":                self._name[i],
+                "stars":               self._stars[i],
+                "location":            pool[self._location[i]],
+                "room_type":           pool[self._room_type[i]],
+                "price_per_night":     self._price[i],
+                "currency":            "INR",
+                "amenities":           pool[self._amenities[i]],
+                "cancellation_policy": pool[self._policy[i]],
+                "rating":              self._rating[i] / 10,
+                "reviews":             self._reviews[i],
+                "breakfast_included":  bool(self._breakfast[i]),
+                "highlights":          pool[self._highlights[i]],
+            })
+        return rec
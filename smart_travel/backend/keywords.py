@@ -0,0 +1,77 @@
+"""
+Keyword Matcher -
+
+Aho-Corasick automaton over several named keyword sets. One left-to-right
+pass over a message reports every set with at least one keyword in it,
+as a bitmap — the same answer as `any(k in text for k in kw_set)` per
+set, with plain substring semantics (no word boundaries).
+
+The automaton is compiled to a full transition table (goto + failure
+links folded together), so scanning is one dict lookup per character.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Iterable
+
+
+class KeywordMatcher:
+    def __init__(self, sets: dict[str, Iterable[str]]):
+        self.bits: dict[str, int] = {name: 1 << i for i, name in enumerate(sets)}
+
+        # Trie of every keyword; out[state] = bits of keywords ending here.
+        goto: list[dict[str, int]] = [{}]
+        out:  list[int] = [0]
+        for name, words in sets.items():
+            bit = self.bits[name]
+            for word in words:
+                state = 0
+                for ch in word:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        out.append(0)
+                    state = nxt
+                out[state] |= bit
+
+        # Failure links breadth-first; a state also reports every keyword
+        # that is a suffix of its path, and inherits its failure state's moves.
+        fail  = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict()] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+                queue.append(nxt)
+
+        self._delta = delta
+        self._out   = out
+
+    def scan(self, text: str) -> int:
+        """Bitmap of the sets with a keyword occurring anywhere in `text`."""
+        delta, out = self._delta, self._out
+        state = hits = 0
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            hits |= out[state]
+        return hits
+
+    def scan_many(self, texts: Iterable[str]) -> list[int]:
+        """scan() of each text, in one loop over all of them."""
+        delta, out = self._delta, self._out
+        found = []
+        for text in texts:
+            state = hits = 0
+            for ch in text:
+                state = delta[state].get(ch, 0)
+                hits |= out[state]
+            found.append(hits)
+        return found
+
+    def names(self, hits: int) -> set[str]:
+        return {name for name, bit in self.bits.items() if hits & bit}
@@ -0,0 +1,199 @@
+"""
+Admission Control -
+
+Keeps one noisy client, or too much traffic overall, from pushing every
+request's latency up without bound.
+
+  RateLimiter — token buckets per key (session id, client IP) → 429
+  Admission   — global cap on turns in flight with a short, bounded
+                wait queue; anything beyond it is shed → 503
+  Limits      — both, as used by the chat endpoints of either server
+"""
+from __future__ import annotations
+import math, threading, time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .metrics import REJECTED
+
+
+class Rejected(Exception):
+    """Request refused; the HTTP layer answers `status` with Retry-After."""
+
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status      = status
+        self.reason      = reason
+        self.retry_after = max(1, math.ceil(retry_after))   # whole seconds on the wire
+
+
+class RateLimiter:
+    """
+    `rate` tokens per second up to `burst` per key. Buckets for the least
+    recently seen keys are dropped past `max_keys`; a dropped bucket would
+    have refilled anyway unless its key came back within burst/rate seconds.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        self.rate     = rate
+        self.burst    = burst
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list] = OrderedDict()   # key → [tokens, stamp]
+        self._lock    = threading.Lock()
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        """Spend `cost` tokens: 0.0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                b = self._buckets[key] = [self.burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+                b[1] = now
+            # A cost above `burst` is let through on a full bucket and
+            # paid back as debt, so large batches are slowed, not barred.
+            if b[0] >= min(cost, self.burst):
+                b[0] -= cost
+                return 0.0
+            return (min(cost, self.burst) - b[0]) / self.rate
+
+    def refund(self, key: str, cost: float) -> None:
+        """Give back tokens taken for a request that was then refused."""
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is not None:
+                b[0] = min(self.burst, b[0] + cost)
+
+
+class Admission:
+    """
+    At most `max_active` slots held; up to `max_queue` more requests wait
+    `timeout` seconds. A request may need several slots (a batch running
+    sessions in parallel); it never needs more than `max_active`.
+    """
+
+    def __init__(self, max_active: int, max_queue: int, timeout: float):
+        self.max_active = max_active
+        self.max_queue  = max_queue
+        self.timeout    = timeout
+        self.active     = 0
+        self.waiting    = 0
+        self._cond      = threading.Condition()
+
+    def acquire(self, slots: int = 1) -> bool:
+        slots = min(slots, self.max_active)
+        with self._cond:
+            if self.active + slots <= self.max_active and not self.waiting:
+                self.active += slots
+                return True
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self.active + slots <= self.max_active, self.timeout):
+                    return False
+                self.active += slots
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, slots: int = 1) -> None:
+        with self._cond:
+            self.active -= min(slots, self.max_active)
+            # Waiters may need several slots each; let every one re-check.
+            self._cond.notify_all()
+
+
+class Limits:
+    """Rate limits and admission for chat turns; a rate or cap of 0 disables it."""
+
+    def __init__(self, session_rate: float, session_burst: float,
+                 ip_rate: float, ip_burst: float,
+                 max_active: int, max_queue: int, queue_timeout: float):
+        self.sessions  = RateLimiter(session_rate, session_burst) if session_rate > 0 else None
+        self.ips       = RateLimiter(ip_rate, ip_burst) if ip_rate > 0 else None
+        self.admission = Admission(max_active, max_queue, queue_timeout) if max_active > 0 else None
+
+    def check(self, sid: Optional[str], ip: Optional[str], cost: int = 1) -> None:
+        """Charge the client's buckets, or raise Rejected(429)."""
+        self.check_many(ip, {sid: cost} if sid is not None else {}, cost)
+
+    def check_many(self, ip: Optional[str], turns: dict[str, int], cost: int) -> None:
+        """
+        Charge the IP `cost` and each session its number of turns, or raise
+        Rejected(429). A batch pays into every session's bucket it names,
+        just as the same turns sent one by one would.
+        """
+        # IP first: a client rotating session ids is still caught, and a
+        # refused request does not also spend its sessions' tokens.
+        if self.ips and ip is not None:
+            self._take(self.ips, ip, cost, "ip_rate")
+        if self.sessions:
+            charged = {}
+            try:
+                for sid, n in turns.items():
+                    self._take(self.sessions, sid, n, "session_rate")
+                    charged[sid] = n
+            except Rejected:
+                self.refund(ip, charged, cost)
+                raise
+
+    def refund(self, ip: Optional[str], turns: dict[str, int], cost: int) -> None:
+        """Give back what check_many() charged, for a request refused after all."""
+        if self.ips and ip is not None:
+            self.ips.refund(ip, cost)
+        if self.sessions:
+            for sid, n in turns.items():
+                self.sessions.refund(sid, n)
+
+    @staticmethod
+    def _take(limiter: RateLimiter, key: str, cost: int, reason: str) -> None:
+        wait = limiter.take(key, cost)
+        if wait:
+            REJECTED.inc(reason)
+            raise Rejected(429, reason, wait)
+
+    def enter(self, sid: Optional[str], ip: Optional[str], cost: int = 1) -> None:
+        """check(), then take an admission slot or raise Rejected(503)."""
+        self._enter(ip, {sid: cost} if sid is not None else {}, cost, 1)
+
+    def _enter(self, ip: Optional[str], turns: dict[str, int], cost: int, slots: int) -> None:
+        self.check_many(ip, turns, cost)
+        if self.admission and not self.admission.acquire(slots):
+            # Shed for load the client didn't cause: don't also charge it.
+            self.refund(ip, turns, cost)
+            REJECTED.inc("overloaded")
+            raise Rejected(503, "overloaded", self.admission.timeout)
+
+    def leave(self, slots: int = 1) -> None:
+        if self.admission:
+            self.admission.release(slots)
+
+    @contextmanager
+    def admit(self, sid: Optional[str], ip: Optional[str], cost: int = 1) -> Iterator[None]:
+        self.enter(sid, ip, cost)
+        try:
+            yield
+        finally:
+            self.leave()
+
+    @contextmanager
+    def admit_batch(self, ip: Optional[str], turns: dict[str, int], slots: int) -> Iterator[None]:
+        """
+        A batch: check_many() for its turns, then `slots` admission slots,
+        one per session it runs at the same time.
+        """
+        self._enter(ip, turns, sum(turns.values()), slots)
+        try:
+            yield
+        finally:
+            self.leave(slots)
+
+    def stats(self) -> dict:
+        a = self.admission
+        return {"active": a.active, "queued": a.waiting} if a else {}
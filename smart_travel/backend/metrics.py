@@ -0,0 +1,189 @@
+"""
+Metrics -
+
+In-process latency histograms and counters for the chat pipeline,
+rendered in the Prometheus text exposition format on /metrics.
+
+Recording is a bisect plus a few list increments under a per-metric
+lock, cheap enough to leave on. Each pre-forked worker records into its
+own copy of REGISTRY; the front merges their snapshots when scraped.
+"""
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Iterable
+
+# Upper bounds in seconds; a turn is normally well under a millisecond.
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                   0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "start")
+
+    def __init__(self, hist: "Histogram", labels: tuple):
+        self.hist   = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(perf_counter() - self.start, *self.labels)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]):
+        self.name, self.help, self.labels = name, help, labels
+        self._series: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0.0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._series)
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def lines(self, series: dict) -> Iterable[str]:
+        for labels, value in sorted(series.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {_num(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...],
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help, labels
+        self.buckets = buckets
+        # labels → [count per bucket ..., count above the last bucket, sum]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            s[i] += 1
+            s[-1] += value
+
+    def time(self, *labels) -> _Timer:
+        return _Timer(self, labels)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    @staticmethod
+    def merge(a, b):
+        return [x + y for x, y in zip(a, b)]
+
+    def lines(self, series: dict) -> Iterable[str]:
+        bounds = [_num(b) for b in self.buckets] + ["+Inf"]
+        for labels, s in sorted(series.items()):
+            cumulative = 0
+            for le, n in zip(bounds, s):
+                cumulative += n
+                yield (f"{self.name}_bucket"
+                       f"{_labels(self.labels + ('le',), labels + (le,))} {cumulative}")
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {_num(s[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def snapshot(self) -> dict:
+        """Plain, picklable copy of every series: {name: {labels: state}}."""
+        return {name: m.snapshot() for name, m in self.metrics.items()}
+
+    def merge(self, snapshots: Iterable[dict]) -> dict:
+        out: dict = {}
+        for snap in snapshots:
+            for name, series in snap.items():
+                merge = self.metrics[name].merge
+                dest  = out.setdefault(name, {})
+                for labels, state in series.items():
+                    dest[labels] = merge(dest[labels], state) if labels in dest else state
+        return out
+
+    def render(self, snapshot: dict, gauges: dict[str, float] = None) -> bytes:
+        lines = []
+        for name, m in self.metrics.items():
+            lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            lines.extend(m.lines(snapshot.get(name, {})))
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_num(value)}")
+        return ("\n".join(lines) + "\n").encode()
+
+
+def _num(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+# ── Instruments ───────────────────────────────────────────────
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "smart_travel_stage_seconds",
+    "Time spent in each engine stage of a chat turn.",
+    ("stage", "intent", "service"),
+)
+TURNS = REGISTRY.counter(
+    "smart_travel_turns_total",
+    "Chat turns processed, by classified intent and active service.",
+    ("intent", "service"),
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "smart_travel_http_seconds",
+    "Request body parse and response encode time in the HTTP layer.",
+    ("stage", "endpoint"),
+)
+REJECTED = REGISTRY.counter(
+    "smart_travel_rejected_total",
+    "Chat requests refused by rate limiting (429) or load shedding (503).",
+    ("reason",),
+)
+CLASSIFY_CACHE = REGISTRY.counter(
+    "smart_travel_classify_cache_total",
+    "classify() calls answered from the result cache (hit) or computed (miss).",
+    ("result",),
+)
+SEARCH_CACHE = REGISTRY.counter(
+    "smart_travel_search_cache_total",
+    "Searches answered from the shared results (hit) or run (miss).",
+    ("service", "result"),
+)
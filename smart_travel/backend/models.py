@@ -6,11 +6,12 @@ All state is explicit, typed, and owned here.
 Nothing lives in raw chat history.
 """
 from __future__ import annotations
+from collections.abc import Mapping
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Optional
-import uuid
+from typing import Any, Iterator, Optional
+import json
 
 
 class ServiceType(str, Enum):
@@ -37,6 +38,93 @@ class SlotStatus(str, Enum):
     STALE     = "stale"
 
 
+class Offer(Mapping):
+    """
+    A read-only search result (flight or hotel offer).
+
+    An offer is a shared inventory record (see record()) plus a small dict
+    of per-search fields — date, passengers, totals — that override or
+    extend it. Searches copy nothing from the record, and reading or
+    encoding an offer gives the same keys, in the same order, as the
+    merged dict would.
+
+    Offers are shown again on select, query, cancel and resume, so the
+    JSON encoding is computed once and cached; backend.serialize splices
+    the cached bytes into each response instead of re-encoding the dict.
+    """
+    __slots__ = ("_base", "_extra", "_json")
+
+    def __init__(self, base: Mapping, extra: Optional[dict] = None):
+        self._base  = base
+        self._extra = extra or {}
+        self._json: Optional[bytes] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._extra:
+            return self._extra[key]
+        return self._base[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._base
+        for key in self._extra:
+            if key not in self._base:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._base) + sum(k not in self._base for k in self._extra)
+
+    def __repr__(self) -> str:
+        return f"Offer({self._merged()!r})"
+
+    def _merged(self) -> dict:
+        return {**self._base, **self._extra}
+
+    def encoded(self) -> bytes:
+        if self._json is None:
+            self._json = json.dumps(self._merged()).encode()
+        return self._json
+
+    # Offers reach the front process by pickle when SMART_TRAVEL_WORKERS > 1;
+    # the encoding travels with them so it is made once, in the worker.
+    # Offers sharing a record in one pickle share it again when loaded.
+    def __getstate__(self):
+        return self._base, self._extra, self.encoded()
+
+    def __setstate__(self, state) -> None:
+        self._base, self._extra, self._json = state
+
+
+# ── Inventory records ─────────────────────────────────────────
+# Each inventory builds one record per leg or hotel and keeps it for its
+# own lifetime (FlightInventory._records, HotelInventory._records).
+
+class _Frozen(dict):
+    """A dict that refuses writes; pickles as a plain dict."""
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("inventory records are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return _Frozen, (dict(self),)
+
+
+def record(data: Mapping) -> Mapping:
+    """Read-only copy of an inventory record (lists → tuples, dicts → frozen dicts)."""
+    return _freeze(data)
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return _Frozen({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 @dataclass
 class Slot:
     name:     str
@@ -101,7 +189,7 @@ class FlightContext:
     step:              FlowStep           = FlowStep.IDLE
     search_params:     FlightSearchParams = field(default_factory=FlightSearchParams)
     search_results:    list               = field(default_factory=list)
-    selected_offer:    Optional[dict]     = None
+    selected_offer:    Optional[Offer]    = None
     passenger_details: PassengerDetails   = field(default_factory=PassengerDetails)
     booking_ref:       Optional[str]      = None
 
@@ -171,7 +259,7 @@ class HotelContext:
     step:           FlowStep         = FlowStep.IDLE
     search_params:  HotelSearchParams = field(default_factory=HotelSearchParams)
     search_results: list             = field(default_factory=list)
-    selected_offer: Optional[dict]   = None
+    selected_offer: Optional[Offer]  = None
     guest_details:  GuestDetails     = field(default_factory=GuestDetails)
     booking_ref:    Optional[str]    = None
 
@@ -215,17 +303,32 @@ class SessionMemory:
     conversation:     list          = field(default_factory=list)
     global_facts:     dict          = field(default_factory=dict)
     created_at:       str           = field(default_factory=lambda: datetime.now().isoformat())
+    # Bumped on every mutation; lets readers skip rebuilding snapshots.
+    version:          int           = 0
+    _snapshot:        Optional[tuple] = field(default=None, repr=False, compare=False)
+
+    def touch(self) -> None:
+        """Record a mutation. Nested contexts are changed in place by the
+        engine, which calls this once it is done with a turn."""
+        self.version += 1
+
+    @property
+    def etag(self) -> str:
+        # session_id is random per memory, so a reset never reuses a tag.
+        return f"{self.session_id}.{self.version}"
 
     def switch_service(self, new_service: ServiceType) -> None:
         if self.active_service != new_service:
             self.previous_service = self.active_service
             self.active_service   = new_service
+            self.touch()
 
     def resume_previous(self) -> bool:
         if self.previous_service != ServiceType.NONE:
             self.active_service, self.previous_service = (
                 self.previous_service, self.active_service
             )
+            self.touch()
             return True
         return False
 
@@ -242,6 +345,13 @@ class SessionMemory:
             "time":    datetime.now().isoformat(),
             "service": self.active_service.value,
         })
+        self.touch()
+
+    def snapshot(self) -> dict:
+        """to_dict(), rebuilt only when the version has moved."""
+        if self._snapshot is None or self._snapshot[0] != self.version:
+            self._snapshot = (self.version, self.to_dict())
+        return self._snapshot[1]
 
     def to_dict(self) -> dict:
         return {
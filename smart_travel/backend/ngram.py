@@ -0,0 +1,180 @@
+"""
+N-gram Intent Model -
+
+A second classifier engine for intent.ENGINES: hashed character n-grams
+and word features scored by a linear softmax model, instead of the rule
+cascade. Only the intent comes from the model; service and slots are
+filled by the rule extractors (intent.extract), so results have the same
+IntentResult shape and the engine can be swapped per deployment.
+
+A model is a directory:
+
+  weights.npy   float32 (dim × intents), opened with mmap_mode="r" — loading
+                is instant and pre-forked workers share the page cache
+  meta.json     labels, bias, dim, n-gram sizes
+
+  python -m backend.ngram train backend/data/intents.tsv --out models/intent
+  python -m backend.ngram eval  my_labeled.tsv --model models/intent
+
+Training data is TSV: text, awaiting slot (may be empty), intent. Rows
+with no intent are labeled by the rule classifier, so unlabeled logs can
+be used to distil the rules. Needs numpy.
+"""
+from __future__ import annotations
+import argparse, csv, json, math, os, random, re, sys, zlib
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .intent import IntentResult, Message, classify, extract
+
+Sample = tuple[str, Optional[str], str]         # text, awaiting_slot, intent
+
+DEFAULT_DIM = 1 << 18
+NGRAMS      = (2, 3, 4)
+_DIGITS     = re.compile(r'\d')
+
+
+def features(m: Message, awaiting_slot: Optional[str], dim: int = DEFAULT_DIM,
+             ngrams: Sequence[int] = NGRAMS) -> np.ndarray:
+    """Sorted, distinct hashed feature indices of a message and its context."""
+    text   = _DIGITS.sub("0", m.norm)             # "2026-03-20" and "4" generalize
+    padded = f" {text} "
+    slot   = awaiting_slot or "-"
+    words  = text.split()
+    feats  = [padded[i:i + n] for n in ngrams for i in range(len(padded) - n + 1)]
+    feats += ["w:" + w for w in words]
+    # The same reply means different things depending on what was asked.
+    feats += ["a:" + slot, f"a:{slot}|n:{min(len(words), 4)}"]
+    feats += [f"a:{slot}|w:{w}" for w in words]
+    mask = dim - 1
+    return np.unique(np.fromiter((zlib.crc32(f.encode()) & mask for f in feats),
+                                 dtype=np.int64, count=len(feats)))
+
+
+class IntentModel:
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, labels: list[str],
+                 ngrams: Sequence[int] = NGRAMS):
+        self.weights = weights
+        self.bias    = bias
+        self.labels  = labels
+        self.dim     = weights.shape[0]
+        self.ngrams  = tuple(ngrams)
+
+    # ── Files ─────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path: str) -> "IntentModel":
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        weights = np.load(os.path.join(path, "weights.npy"), mmap_mode="r")
+        return cls(weights, np.asarray(meta["bias"], dtype=np.float32),
+                   meta["labels"], meta["ngrams"])
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "weights.npy"), np.asarray(self.weights, dtype=np.float32))
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"labels": self.labels, "bias": [float(b) for b in self.bias],
+                       "dim": self.dim, "ngrams": list(self.ngrams)}, f, indent=2)
+
+    # ── Inference ─────────────────────────────────────────────
+
+    def scores(self, m: Message, awaiting_slot: Optional[str]) -> np.ndarray:
+        idx = features(m, awaiting_slot, self.dim, self.ngrams)
+        return self.weights[idx].sum(axis=0) / math.sqrt(len(idx)) + self.bias
+
+    def predict(self, text: str, awaiting_slot: Optional[str] = None) -> str:
+        return self.labels[int(np.argmax(self.scores(Message(text.strip()), awaiting_slot)))]
+
+    def classify(self, text: str, awaiting_slot: Optional[str] = None) -> IntentResult:
+        """Same contract as intent.classify(); the intent is the model's."""
+        m = Message(text.strip())
+        label = self.labels[int(np.argmax(self.scores(m, awaiting_slot)))]
+        r = extract(m, label, awaiting_slot)
+        return IntentResult(r.intent, r.service, r.slots, text)
+
+
+# ── Training ──────────────────────────────────────────────────
+
+def train(samples: Sequence[Sample], dim: int = DEFAULT_DIM, epochs: int = 20,
+          lr: float = 0.5, seed: int = 0) -> IntentModel:
+    """Softmax regression by plain SGD over the (sparse, binary) features."""
+    labels = sorted({label for _, _, label in samples})
+    index  = {label: i for i, label in enumerate(labels)}
+    xs = [features(Message(t.strip()), a, dim) for t, a, _ in samples]
+    ys = [index[label] for _, _, label in samples]
+    # Rare intents weigh more, so a short command is not pulled towards
+    # whichever intent has the most examples.
+    counts = np.bincount(ys, minlength=len(labels))
+    class_weight = np.sqrt(len(ys) / (len(labels) * counts)).astype(np.float32)
+
+    weights = np.zeros((dim, len(labels)), dtype=np.float32)
+    bias    = np.zeros(len(labels), dtype=np.float32)
+    order   = list(range(len(samples)))
+    rnd     = random.Random(seed)
+    for epoch in range(epochs):
+        rnd.shuffle(order)
+        step = lr / (1 + epoch)
+        for i in order:
+            idx, scale = xs[i], 1 / math.sqrt(len(xs[i]))
+            z = weights[idx].sum(axis=0) * scale + bias
+            p = np.exp(z - z.max())
+            p /= p.sum()
+            p[ys[i]] -= 1.0                       # gradient of cross-entropy wrt z
+            p *= class_weight[ys[i]]
+            weights[idx] -= (step * scale) * p
+            bias -= step * p
+    return IntentModel(weights, bias, labels)
+
+
+def read_tsv(path: str) -> list[Sample]:
+    """text, awaiting (optional), intent (optional → labeled by the rules)."""
+    samples = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter="\t"):
+            if not row or not row[0].strip() or row[0].startswith("#"):
+                continue
+            text     = row[0]
+            awaiting = (row[1] if len(row) > 1 else "").strip() or None
+            label    = (row[2] if len(row) > 2 else "").strip()
+            samples.append((text, awaiting, label or classify(text, awaiting).intent))
+    return samples
+
+
+def accuracy(model: IntentModel, samples: Iterable[Sample]) -> tuple[int, int]:
+    samples = list(samples)
+    right = sum(model.predict(t, a) == label for t, a, label in samples)
+    return right, len(samples)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m backend.ngram",
+                                 description="Train or evaluate the n-gram intent model.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("train", help="fit a model on labeled TSV files")
+    t.add_argument("data", nargs="+")
+    t.add_argument("--out", required=True, help="model directory to write")
+    t.add_argument("--dim", type=int, default=DEFAULT_DIM, help="hashed feature space (power of 2)")
+    t.add_argument("--epochs", type=int, default=20)
+    e = sub.add_parser("eval", help="intent accuracy of a model on labeled TSV files")
+    e.add_argument("data", nargs="+")
+    e.add_argument("--model", required=True)
+    args = ap.parse_args(argv)
+
+    samples = [s for path in args.data for s in read_tsv(path)]
+    if args.cmd == "train":
+        if args.dim & (args.dim - 1):
+            ap.error("--dim must be a power of 2")
+        model = train(samples, args.dim, args.epochs)
+        model.save(args.out)
+        right, n = accuracy(model, samples)
+        print(f"{n} samples, {len(model.labels)} intents, training accuracy {right / n:.1%} → {args.out}")
+    else:
+        right, n = accuracy(IntentModel.load(args.model), samples)
+        print(f"{right}/{n} correct ({right / n:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
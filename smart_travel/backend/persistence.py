@@ -0,0 +1,203 @@
+"""
+Session Persistence -
+
+Durable backing for SessionStore so a deploy or crash doesn't drop
+in-flight booking flows.
+
+  SessionBackend  — pluggable interface: load / save_many / delete_many
+  SQLiteBackend   — reference implementation on a single SQLite file
+  WriteBehind     — background flusher; request threads only mark a
+                    session dirty, the pickling and disk write happen
+                    here in batches
+"""
+from __future__ import annotations
+import logging, pickle, sqlite3, threading, time
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+
+class SessionBackend:
+    """Stores opaque engine snapshots keyed by session id."""
+
+    def load(self, sid: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def save_many(self, items: dict[str, bytes]) -> None:
+        raise NotImplementedError
+
+    def delete_many(self, sids: list[str]) -> None:
+        raise NotImplementedError
+
+    def purge(self, older_than: float) -> int:
+        """Drop snapshots last written before `older_than` (epoch seconds)."""
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend(SessionBackend):
+    def __init__(self, path: str):
+        self.path = path
+        self._db  = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")      # readers never block the flusher
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")     # workers share one file
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY, state BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def load(self, sid: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT state FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        return row[0] if row else None
+
+    def save_many(self, items: dict[str, bytes]) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO sessions (sid, state, updated) VALUES (?, ?, ?)",
+                    [(sid, blob, now) for sid, blob in items.items()],
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                # Leave no open transaction behind, or every later BEGIN fails.
+                if self._db.in_transaction:      # some errors roll back by themselves
+                    self._db.execute("ROLLBACK")
+                raise
+
+    def delete_many(self, sids: list[str]) -> None:
+        with self._lock:
+            self._db.executemany("DELETE FROM sessions WHERE sid = ?", [(s,) for s in sids])
+
+    def purge(self, older_than: float) -> int:
+        with self._lock:
+            return self._db.execute("DELETE FROM sessions WHERE updated < ?", (older_than,)).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# Stamped on every snapshot. Bump it when TravelEngine or the models it
+# holds change layout: rows written under another stamp are discarded
+# rather than unpickled into the new classes.
+SNAPSHOT_FORMAT = b"st1:"
+
+
+class BadSnapshot(ValueError):
+    """A stored snapshot that can't be loaded: another format, or corrupt."""
+
+
+def dump_engine(engine) -> bytes:
+    return SNAPSHOT_FORMAT + pickle.dumps(engine, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_engine(blob: bytes):
+    # Snapshots are only ever written by this server to its own file.
+    if not blob.startswith(SNAPSHOT_FORMAT):
+        raise BadSnapshot(f"snapshot format {bytes(blob[:4])!r}, expected {SNAPSHOT_FORMAT!r}")
+    try:
+        return pickle.loads(memoryview(blob)[len(SNAPSHOT_FORMAT):])
+    except Exception as e:
+        raise BadSnapshot(f"{type(e).__name__}: {e}") from e
+
+
+class WriteBehind:
+    """
+    Batches dirty sessions to a SessionBackend from a daemon thread.
+
+    `mark()` keeps a reference to the Session object itself, so a session
+    evicted from the store before the next flush is still written.
+    """
+
+    def __init__(self, backend: SessionBackend, interval: float = 1.0,
+                 retention: float = 7 * 86400):
+        self.backend   = backend
+        self.interval  = interval
+        self.retention = retention
+        self._dirty:   dict = {}          # sid → Session
+        self._deleted: set[str] = set()
+        self._inflight: tuple[dict, set] = ({}, set())   # taken by the current flush
+        self._lock     = threading.Lock()
+        self._stop     = threading.Event()
+        self._last_purge = 0.0
+        self.flushes   = 0
+        self.written   = 0
+        self._thread   = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def mark(self, sid: str, session) -> None:
+        with self._lock:
+            self._dirty[sid] = session
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._dirty.pop(sid, None)
+            self._deleted.add(sid)
+
+    def pending(self, sid: str):
+        """
+        Unflushed state for `sid`: the dirty Session, False if a delete is
+        queued (the row on disk is stale), or None if nothing is pending.
+        """
+        with self._lock:
+            if sid in self._dirty:
+                return self._dirty[sid]
+            if sid in self._deleted:
+                return False
+            dirty, deleted = self._inflight
+            if sid in dirty:
+                return dirty[sid]
+            if sid in deleted:
+                return False
+        return None
+
+    def flush(self) -> None:
+        with self._lock:
+            dirty, self._dirty     = self._dirty, {}
+            deleted, self._deleted = self._deleted, set()
+            self._inflight = (dirty, deleted)
+        try:
+            if deleted:
+                self.backend.delete_many(list(deleted))
+                deleted = set()
+            if dirty:
+                items = {}
+                for sid, s in dirty.items():
+                    with s.lock:                 # consistent snapshot between turns
+                        items[sid] = dump_engine(s.engine)
+                self.backend.save_many(items)
+                self.written += len(items)
+                dirty = {}
+        finally:
+            # Requeue anything not written; newer marks and deletes win.
+            with self._lock:
+                for sid, s in dirty.items():
+                    if sid not in self._deleted:
+                        self._dirty.setdefault(sid, s)
+                self._deleted |= {sid for sid in deleted if sid not in self._dirty}
+                self._inflight = ({}, set())
+        self.flushes += 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+                now = time.time()
+                if now - self._last_purge > 3600:
+                    self._last_purge = now
+                    self.backend.purge(now - self.retention)
+            except Exception:                    # keep flushing on the next tick
+                log.exception("session flush failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval + 1)
+        self.flush()
+        self.backend.close()
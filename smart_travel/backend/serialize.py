@@ -0,0 +1,53 @@
+"""
+Response Serialization -
+
+Turns engine responses into JSON bytes for the HTTP layer.
+
+Offers (models.Offer) carry their own cached encoding. During dumps()
+each one is replaced by a placeholder string, the rest of the response
+is encoded by the C json encoder, and the cached offer bytes are then
+spliced in where the placeholders were. The only other non-JSON types
+in a response are the Enums and datetimes from models.py, which get
+explicit encoders instead of a catch-all `default=str`.
+"""
+from __future__ import annotations
+import json, secrets
+from datetime import date, datetime
+from enum import Enum
+
+from .models import Offer
+
+# Per-process nonce so text in a response can never look like a placeholder.
+_NONCE  = secrets.token_hex(8)
+_OPEN   = f'"\\u0000{_NONCE}:'
+_CLOSE  = '\\u0000"'
+
+
+def _encode_scalar(o):
+    if isinstance(o, Enum):
+        return o.value
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj) -> bytes:
+    fragments: list[bytes] = []
+
+    def default(o):
+        if isinstance(o, Offer):
+            fragments.append(o.encoded())
+            return f"\x00{_NONCE}:{len(fragments) - 1}\x00"
+        return _encode_scalar(o)
+
+    text = json.dumps(obj, default=default)
+    if not fragments:
+        return text.encode()
+
+    pieces = text.split(_OPEN)
+    out = [pieces[0].encode()]
+    for piece in pieces[1:]:
+        idx, rest = piece.split(_CLOSE, 1)
+        out.append(fragments[int(idx)])
+        out.append(rest.encode())
+    return b"".join(out)
@@ -0,0 +1,257 @@
+"""
+Session Store -
+
+Owns one TravelEngine per browser session for the web server.
+Turns for different sessions run in parallel; turns within a single
+session are serialized by a per-session lock so the engine's state
+machine never sees two messages at once.
+
+The store is bounded: sessions idle for longer than `idle_ttl` seconds
+are dropped, and once `max_size` is reached the least recently used
+session is evicted to make room.
+
+With a SessionBackend attached, sessions touched by a turn are written
+behind by a background thread and an evicted or pre-restart session is
+rehydrated from disk the first time it is asked for again. A snapshot
+that won't load (corrupt, or from an older SNAPSHOT_FORMAT) is deleted
+and the session starts over.
+"""
+from __future__ import annotations
+import logging, queue, threading, time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from .engine import EventSink, TravelEngine
+from .persistence import BadSnapshot, SessionBackend, WriteBehind, load_engine
+
+log = logging.getLogger(__name__)
+
+
+class Session:
+    """One engine plus the lock that serializes its turns."""
+    __slots__ = ("engine", "lock", "changed", "dropped", "last_seen")
+
+    def __init__(self, engine: TravelEngine):
+        self.engine    = engine
+        self.lock      = threading.Lock()
+        self.changed   = threading.Condition(self.lock)   # notified after each turn
+        self.dropped   = False                            # reset or evicted
+        self.last_seen = time.monotonic()
+
+    def drop(self) -> None:
+        """Mark the session gone and wake long-polls waiting on it."""
+        with self.lock:
+            self.dropped = True
+            self.changed.notify_all()
+
+
+class SessionStore:
+    def __init__(self, factory: Callable[[], TravelEngine] = TravelEngine,
+                 max_size: int = 10_000, idle_ttl: float = 1800.0,
+                 backend: Optional[SessionBackend] = None, flush_interval: float = 1.0):
+        self._factory  = factory
+        self.max_size  = max_size
+        self.idle_ttl  = idle_ttl
+        # Ordered least → most recently used, so both idle and LRU
+        # victims are always found at the front.
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock     = threading.Lock()   # guards the dict only, never held during a turn
+        self._writer   = WriteBehind(backend, flush_interval) if backend else None
+        self.created       = 0
+        self.restored      = 0
+        self.evicted_idle  = 0
+        self.evicted_lru   = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _get(self, sid: str) -> Session:
+        now = time.monotonic()
+        with self._lock:
+            evicted = self._expire(now)
+            s = self._sessions.get(sid)
+            if s is not None:
+                self._sessions.move_to_end(sid)
+                s.last_seen = now
+        # Evicted sessions are dropped outside the dict lock: waking their
+        # long-polls takes each one's turn lock.
+        for old in evicted:
+            old.drop()
+        if s is not None:
+            return s
+        # Miss: rehydrate outside the dict lock so a disk read never
+        # stalls other sessions.
+        restored = self._restore(sid) if self._writer else None
+        evicted = []
+        with self._lock:
+            s = self._sessions.get(sid)
+            if s is None:
+                while len(self._sessions) >= self.max_size:
+                    evicted.append(self._sessions.popitem(last=False)[1])
+                    self.evicted_lru += 1
+                if restored is not None:
+                    s = restored
+                    self.restored += 1
+                else:
+                    s = Session(self._factory())
+                    self.created += 1
+                self._sessions[sid] = s
+            else:
+                self._sessions.move_to_end(sid)
+            s.last_seen = now
+        for old in evicted:
+            old.drop()
+        return s
+
+    def _restore(self, sid: str) -> Optional[Session]:
+        pending = self._writer.pending(sid)
+        if pending is False:                # reset queued; disk row is stale
+            return None
+        if pending is not None:             # evicted before its flush
+            return pending
+        blob = self._writer.backend.load(sid)
+        if not blob:
+            return None
+        try:
+            return Session(load_engine(blob))
+        except BadSnapshot as e:
+            # Start the session over rather than fail every request for it.
+            log.warning("discarding session %s: %s", sid, e)
+            self._writer.delete(sid)
+            return None
+
+    def _expire(self, now: float) -> list[Session]:
+        """
+        Remove idle sessions from the LRU end and return them for the
+        caller to drop() once it has released self._lock, which it holds.
+        """
+        cutoff  = now - self.idle_ttl
+        expired = []
+        while self._sessions:
+            s = next(iter(self._sessions.values()))
+            if s.last_seen > cutoff:
+                break
+            expired.append(self._sessions.popitem(last=False)[1])
+            self.evicted_idle += 1
+        return expired
+
+    def sweep(self) -> None:
+        """Expire idle sessions without waiting for the next request."""
+        with self._lock:
+            expired = self._expire(time.monotonic())
+        for s in expired:
+            s.drop()
+
+    def stats(self) -> dict:
+        return {
+            "sessions":     len(self._sessions),
+            "max_size":     self.max_size,
+            "idle_ttl":     self.idle_ttl,
+            "created":      self.created,
+            "restored":     self.restored,
+            "evicted_idle": self.evicted_idle,
+            "evicted_lru":  self.evicted_lru,
+        }
+
+    @contextmanager
+    def acquire(self, sid: str) -> Iterator[TravelEngine]:
+        """Hold the session's lock for the duration of the block."""
+        s = self._get(sid)
+        with s.lock:
+            yield s.engine
+
+    # ── Operations used by the HTTP layer ─────────────────────
+
+    def process(self, sid: str, message: str, on_event: Optional[EventSink] = None) -> list[dict]:
+        s = self._get(sid)
+        with s.lock:
+            responses = s.engine.process(message, on_event)
+            s.changed.notify_all()
+        if self._writer:
+            self._writer.mark(sid, s)
+        return responses
+
+    def process_stream(self, sid: str, message: str) -> Iterator[tuple[str, dict]]:
+        """
+        Yield (event, payload) while the turn runs: search events as offers
+        arrive, then ("done", {"responses": [...]}).
+        """
+        events: queue.Queue = queue.Queue()
+
+        def run() -> None:
+            try:
+                resp = self.process(sid, message, lambda name, data: events.put((name, data)))
+                events.put(("done", {"responses": resp}))
+            except Exception as e:
+                events.put(("error", {"error": f"{type(e).__name__}: {e}"}))
+
+        threading.Thread(target=run, name=f"stream-{sid}", daemon=True).start()
+        while True:
+            name, data = events.get()
+            yield name, data
+            if name in ("done", "error"):
+                return
+
+    def snapshot(self, sid: str) -> dict:
+        with self.acquire(sid) as engine:
+            return engine.get_memory_snapshot()
+
+    def memory(self, sid: str, since: Optional[str] = None,
+               wait: float = 0.0) -> tuple[str, Optional[dict]]:
+        """
+        (etag, snapshot) for the session's memory. When the current etag
+        equals `since` the snapshot is None (not modified); with `wait` > 0
+        the call first blocks up to that long for the memory to change.
+        """
+        deadline = time.monotonic() + wait
+        while True:
+            s = self._get(sid)
+            with s.lock:
+                while True:
+                    tag = s.engine.memory_etag()
+                    if tag != since:
+                        return tag, s.engine.get_memory_snapshot()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return tag, None
+                    if s.dropped:
+                        break                    # reset or evicted: look up the new one
+                    s.changed.wait(remaining)
+
+    def reset(self, sid: str) -> None:
+        with self._lock:
+            s = self._sessions.pop(sid, None)
+        if s is not None:
+            s.drop()
+        if self._writer:
+            self._writer.delete(sid)
+
+    def close(self) -> None:
+        """Flush pending writes; call on shutdown."""
+        if self._writer:
+            self._writer.close()
+
+
+def process_batch(store, items: list[tuple[str, str]], executor: Executor) -> list[list[dict]]:
+    """
+    Run (session_id, message) pairs through `store` (a SessionStore or
+    WorkerPool). Each session's messages run in order; different sessions
+    run in parallel on `executor`. Returns response lists in input order.
+    """
+    by_session: dict[str, list[int]] = {}
+    for i, (sid, _) in enumerate(items):
+        by_session.setdefault(sid, []).append(i)
+
+    results: list = [None] * len(items)
+
+    def run(sid: str, indexes: list[int]) -> None:
+        for i in indexes:
+            msg = items[i][1]
+            results[i] = store.process(sid, msg) if msg else []
+
+    futures = [executor.submit(run, sid, idx) for sid, idx in by_session.items()]
+    for f in futures:
+        f.result()
+    return results
@@ -0,0 +1,127 @@
+"""
+HTTP helpers -
+
+Response encoding shared by the Flask and stdlib server backends:
+JSON bodies, gzip negotiation against the client's Accept-Encoding,
+and an in-memory static file cache with ETag / Last-Modified revalidation.
+"""
+from __future__ import annotations
+import gzip, hashlib, mimetypes, os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from .serialize import dumps
+
+# Bodies smaller than this go out uncompressed: below roughly one MTU the
+# gzip header and CPU cost buy nothing.
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL     = 5
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True if the Accept-Encoding header allows gzip (honours q=0)."""
+    if not accept_encoding:
+        return False
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip() in ("gzip", "*"):
+            q = params.strip()
+            if q.startswith("q="):
+                try:
+                    return float(q[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+def encode_body(data: bytes, accept_encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    """Return (body, content_encoding); gzip only when allowed and worth it."""
+    if len(data) >= GZIP_MIN_BYTES and accepts_gzip(accept_encoding):
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0), "gzip"
+    return data, None
+
+
+def json_bytes(obj) -> bytes:
+    return dumps(obj)
+
+
+def unquote_etag(header: Optional[str]) -> Optional[str]:
+    """First entity tag of an If-None-Match header, without W/ and quotes."""
+    if not header:
+        return None
+    return header.split(",")[0].strip().removeprefix("W/").strip('"') or None
+
+
+def sse_event(name: str, data) -> bytes:
+    """One Server-Sent Events frame; JSON never contains a raw newline."""
+    return b"event: " + name.encode() + b"\ndata: " + json_bytes(data) + b"\n\n"
+
+
+# ── Static files ──────────────────────────────────────────────
+
+class StaticAsset:
+    __slots__ = ("body", "gzip", "content_type", "etag", "etag_gz", "mtime", "last_modified")
+
+    def __init__(self, body: bytes, content_type: str, mtime: float):
+        self.body          = body
+        gz                 = gzip.compress(body, compresslevel=9, mtime=0)
+        self.gzip          = gz if len(gz) < len(body) else None
+        self.content_type  = content_type
+        digest             = hashlib.sha256(body).hexdigest()[:20]
+        self.etag          = f'"{digest}"'
+        self.etag_gz       = f'"{digest}-gz"'     # distinct tag per content-coding
+        self.mtime         = int(mtime)
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        if if_none_match:
+            tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+            return "*" in tags or self.etag in tags or self.etag_gz in tags
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(if_modified_since).timestamp() >= self.mtime
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class StaticFiles:
+    """
+    Every file under `root` read once at startup, with its gzip variant
+    and content hash precomputed. "/" serves index.html.
+    """
+
+    def __init__(self, root: str):
+        self.assets: dict[str, StaticAsset] = {}
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                full = os.path.join(dirpath, name)
+                url  = "/" + os.path.relpath(full, root).replace(os.sep, "/")
+                ct   = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                if ct.startswith("text/") or ct in ("application/javascript", "application/json"):
+                    ct += "; charset=utf-8"
+                with open(full, "rb") as f:
+                    self.assets[url] = StaticAsset(f.read(), ct, os.path.getmtime(full))
+        if "/index.html" in self.assets:
+            self.assets["/"] = self.assets["/index.html"]
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path)
+
+    def respond(self, asset: StaticAsset, headers) -> tuple[int, dict, bytes]:
+        """(status, headers, body) for a GET, honouring conditional headers."""
+        use_gz = asset.gzip is not None and accepts_gzip(headers.get("Accept-Encoding"))
+        out = {
+            "Content-Type":  asset.content_type,
+            "ETag":          asset.etag_gz if use_gz else asset.etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": "no-cache",          # revalidate; a 304 is nearly free
+            "Vary":          "Accept-Encoding",
+        }
+        if asset.not_modified(headers.get("If-None-Match"), headers.get("If-Modified-Since")):
+            return 304, out, b""
+        if use_gz:
+            out["Content-Encoding"] = "gzip"
+            return 200, out, asset.gzip
+        return 200, out, asset.body
@@ -0,0 +1,265 @@
+"""
+Worker Pool -
+
+Pre-forked engine processes for multi-core serving.
+
+The HTTP front end stays in one process and hashes each `session_id`
+to a fixed worker, so a session's TravelEngine only ever lives in one
+process. Every worker owns its own SessionStore; the front talks to it
+over a pipe. WorkerPool exposes the same process/snapshot/reset calls
+as SessionStore, so the server can use either one.
+
+Calls carry a request id and a reader thread per worker hands each reply
+to the caller waiting for it, so the pipe is only locked while a request
+is written: a client reading a stream slowly holds up no other session.
+
+A worker that dies is replaced as soon as its pipe breaks; calls in
+flight on it raise WorkerLost (the HTTP layer answers 503) and its
+sessions come back from the session database, if there is one. By then
+the front has threads and sockets a fork would copy mid-use, so the
+replacement starts from a clean process (forkserver, else spawn) and
+runs the pool's `setup` to configure itself as the front did.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import itertools, logging, queue, signal, threading, time, zlib
+
+from typing import Callable, Iterator, Optional
+
+from .metrics import REGISTRY
+from .persistence import SQLiteBackend
+from .sessions import SessionStore
+
+log = logging.getLogger(__name__)
+
+
+class WorkerLost(RuntimeError):
+    """The worker serving a session died mid-call; it has been restarted."""
+
+
+def _worker_main(conn, inherited: list, session_db, store_kwargs: dict, setup) -> None:
+    # Ctrl-C / SIGTERM are handled by the front process; a worker exits
+    # (flushing its sessions) when the front sends "close" or goes away.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # Drop the front's pipe ends copied in by fork, so every worker
+    # sees EOF and exits as soon as the front process goes away.
+    for c in inherited:
+        c.close()
+    if setup is not None:
+        setup()
+    if session_db:
+        # Opened here, after the fork — SQLite handles must not cross it.
+        store_kwargs["backend"] = SQLiteBackend(session_db)
+    store = SessionStore(**store_kwargs)
+    while True:
+        try:
+            rid, op, args = conn.recv()
+        except EOFError:
+            break
+        if op == "close":
+            break
+        try:
+            if op == "process_stream":
+                # Forward search events as they happen, then the result.
+                sid, message = args
+                value = store.process(sid, message,
+                                      lambda name, data: conn.send((rid, "event", (name, data))))
+            elif op == "metrics":
+                value = REGISTRY.snapshot()
+            else:
+                value = getattr(store, op)(*args)
+            conn.send((rid, True, value))
+        except Exception as e:
+            conn.send((rid, False, f"{type(e).__name__}: {e}"))
+    store.close()
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "lock", "waiting")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn    = conn
+        self.lock    = threading.Lock()   # one writer at a time on the pipe
+        self.waiting: dict[int, queue.SimpleQueue] = {}   # request id → replies
+
+
+class WorkerPool:
+    def __init__(self, workers: int, session_db: str = None, setup: Optional[Callable[[], None]] = None,
+                 **store_kwargs):
+        """
+        `setup` configures a worker that doesn't inherit the front's state:
+        one spawned rather than forked, or any replacement. It must be a
+        module-level function, as it is pickled by name.
+        """
+        methods = mp.get_all_start_methods()
+        self._ctx          = mp.get_context("fork" if "fork" in methods else "spawn")
+        self._restart_ctx  = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self._setup        = setup
+        self._session_db   = session_db
+        self._store_kwargs = store_kwargs
+        self._workers: list[_Worker] = []
+        self._ids     = itertools.count()
+        self._closing = False
+        self.restarts = 0
+        for i in range(workers):
+            self._workers.append(_Worker(*self._start(i, self._ctx)))
+        for w in self._workers:
+            self._listen(w)
+
+    def _start(self, i: int, ctx):
+        parent, child = ctx.Pipe()
+        if ctx.get_start_method() == "fork":
+            # Inherits the front's configured modules and pipe ends.
+            inherited, setup = [w.conn for w in self._workers if w.conn is not None] + [parent], None
+        else:
+            inherited, setup = [], self._setup
+        p = ctx.Process(target=_worker_main,
+                        args=(child, inherited, self._session_db, dict(self._store_kwargs), setup),
+                        name=f"engine-worker-{i}", daemon=True)
+        p.start()
+        child.close()
+        return p, parent
+
+    def _listen(self, w: _Worker) -> None:
+        threading.Thread(target=self._read, args=(w, w.conn), daemon=True,
+                         name=f"{w.process.name}-reader").start()
+
+    def _read(self, w: _Worker, conn) -> None:
+        """Route each reply to its caller; replies nobody waits for any more are dropped."""
+        while True:
+            try:
+                rid, tag, value = conn.recv()
+            except (EOFError, OSError) as e:
+                self._lost(w, conn, e)
+                return
+            q = w.waiting.get(rid)
+            if q is not None:
+                q.put((tag, value))
+
+    def _lost(self, w: _Worker, conn, error: BaseException) -> None:
+        """Replace a dead worker in place and fail the calls it had in flight."""
+        with w.lock:
+            if w.conn is not conn:            # already replaced
+                return
+            conn.close()
+            if self._closing:
+                return
+            i = self._workers.index(w)
+            log.warning("%s lost (%s: %s), restarting", w.process.name, type(error).__name__, error)
+            w.conn = None
+            if w.process.is_alive():          # pipe broke but the process hung on
+                w.process.kill()
+            w.process.join(timeout=5)
+            w.process, w.conn = self._start(i, self._restart_ctx)
+            self.restarts += 1
+            lost, w.waiting = w.waiting, {}
+            self._listen(w)
+        for q in lost.values():
+            q.put((None, WorkerLost(f"{w.process.name} restarted")))
+
+    def __len__(self) -> int:
+        return len(self._workers)
+
+    def worker_for(self, sid: str) -> int:
+        """Stable session → worker mapping (crc32, not the salted hash())."""
+        return zlib.crc32(sid.encode()) % len(self._workers)
+
+    def _submit(self, w: _Worker, op: str, args: tuple) -> tuple[int, queue.SimpleQueue]:
+        rid, q = next(self._ids), queue.SimpleQueue()
+        with w.lock:
+            conn = w.conn
+            w.waiting[rid] = q
+            try:
+                conn.send((rid, op, args))
+                return rid, q
+            except OSError as e:
+                error = e
+        self._lost(w, conn, error)
+        return rid, q                         # _lost has failed it
+
+    def _send(self, w: _Worker, op: str, args: tuple = ()):
+        rid, q = self._submit(w, op, args)
+        try:
+            ok, value = q.get()
+        finally:
+            w.waiting.pop(rid, None)
+        if ok is None:
+            raise value
+        if not ok:
+            raise RuntimeError(f"worker {w.process.name}: {value}")
+        return value
+
+    def _call(self, sid: str, op: str, *args):
+        return self._send(self._workers[self.worker_for(sid)], op, (sid,) + args)
+
+    # ── Same surface as SessionStore ──────────────────────────
+    def process(self, sid: str, message: str) -> list[dict]:
+        return self._call(sid, "process", message)
+
+    def snapshot(self, sid: str) -> dict:
+        return self._call(sid, "snapshot")
+
+    def memory(self, sid: str, since: Optional[str] = None,
+               wait: float = 0.0) -> tuple[str, Optional[dict]]:
+        # A worker serves one call at a time, so long-polls are not parked
+        # inside it; the front re-checks with a short backoff instead.
+        deadline = time.monotonic() + wait
+        delay = 0.05
+        while True:
+            tag, snap = self._call(sid, "memory", since)
+            remaining = deadline - time.monotonic()
+            if snap is not None or remaining <= 0:
+                return tag, snap
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+
+    def reset(self, sid: str) -> None:
+        self._call(sid, "reset")
+
+    def process_stream(self, sid: str, message: str) -> Iterator[tuple[str, dict]]:
+        w = self._workers[self.worker_for(sid)]
+        rid, q = self._submit(w, "process_stream", (sid, message))
+        try:
+            while True:
+                tag, value = q.get()
+                if tag == "event":
+                    yield value
+                elif tag is None:
+                    yield "error", {"error": str(value)}
+                    return
+                else:
+                    yield ("done", {"responses": value}) if tag else ("error", {"error": value})
+                    return
+        finally:
+            # A client that went away leaves nothing to drain: the reader
+            # drops the rest of this request's replies.
+            w.waiting.pop(rid, None)
+
+    def stats(self) -> dict:
+        """Counters summed over all workers; bounds are per worker."""
+        total: dict = {}
+        for w in self._workers:
+            for k, v in self._send(w, "stats").items():
+                total[k] = v if k in ("max_size", "idle_ttl") else total.get(k, 0) + v
+        total["workers"] = len(self._workers)
+        total["worker_restarts"] = self.restarts
+        return total
+
+    def metrics(self) -> dict:
+        """Every worker's metric series, merged into one snapshot."""
+        return REGISTRY.merge(self._send(w, "metrics") for w in self._workers)
+
+    def close(self) -> None:
+        self._closing = True
+        for w in self._workers:
+            with w.lock:
+                try:
+                    w.conn.send((None, "close", ()))
+                except OSError:
+                    pass
+        for w in self._workers:
+            w.process.join(timeout=5)
+            if w.process.is_alive():
+                w.process.kill()
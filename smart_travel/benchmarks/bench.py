@@ -0,0 +1,330 @@
+"""
+Benchmark Harness -
+
+Replays the scripted conversations in conversations.py against one or
+more targets and reports throughput, per-turn latency and memory.
+
+  engine   TravelEngine.process called in-process, one engine per conversation
+  stdlib   server.run_stdlib() started in a child process
+  flask    server.run_flask() started in a child process (needs Flask)
+  http://… an already running server
+
+Run from the smart_travel directory:
+
+  python benchmarks/bench.py --target engine --target stdlib \\
+      --conversations 500 --concurrency 16 --out results.json
+
+Every conversation is one simulated user: its turns run in order, and
+`--concurrency` users run at once. Server tuning (SMART_TRAVEL_WORKERS,
+SMART_TRAVEL_THREADS, …) is passed through the environment as usual.
+"""
+from __future__ import annotations
+import argparse, datetime, http.client, json, os, platform, signal, socket
+import subprocess, sys, tempfile, threading, time, urllib.parse, uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from conversations import SCRIPTS, BY_NAME, Script
+
+Turn = Callable[[str], list]          # message → responses
+
+
+# ── Memory ────────────────────────────────────────────────────
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident set of `pid` and its child processes (Linux /proc only)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            total = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except (OSError, ValueError):
+        return None
+    for child in children:
+        total += rss_bytes(child) or 0
+    return total
+
+
+# ── Targets ───────────────────────────────────────────────────
+
+class EngineTarget:
+    """Drives TravelEngine directly; engines stay alive until close() for RSS."""
+    name = "engine"
+
+    def __init__(self):
+        from backend.engine import TravelEngine
+        self._factory = TravelEngine
+        self._engines: list = []
+        self._lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def session(self) -> Turn:
+        engine = self._factory()
+        with self._lock:
+            self._engines.append(engine)
+        return engine.process
+
+    def close(self) -> None:
+        self._engines.clear()
+
+
+class HTTPTarget:
+    """POSTs each turn to /api/chat over one keep-alive connection per thread."""
+
+    def __init__(self, url: str, name: str = None, pid: Optional[int] = None):
+        parts = urllib.parse.urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.name  = name or url
+        self.pid   = pid
+        self._run  = uuid.uuid4().hex[:8]
+        self._seq  = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conns: list[http.client.HTTPConnection] = []
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def session(self) -> Turn:
+        with self._lock:
+            self._seq += 1
+            sid = f"bench-{self._run}-{self._seq}"
+
+        def turn(message: str) -> list:
+            body = json.dumps({"session_id": sid, "message": message}).encode()
+            headers = {"Content-Type": "application/json"}
+            conn = self._conn()
+            try:
+                conn.request("POST", "/api/chat", body, headers)
+                resp = conn.getresponse()
+            except (http.client.HTTPException, OSError):
+                conn.close()                   # server dropped the connection; retry once
+                conn.request("POST", "/api/chat", body, headers)
+                resp = conn.getresponse()
+            data = resp.read()
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+            return json.loads(data)["responses"]
+
+        return turn
+
+    def close(self) -> None:
+        # Idle keep-alive connections would otherwise hold server threads.
+        for conn in self._conns:
+            conn.close()
+
+
+def _wait_for_port(port: int, proc: subprocess.Popen, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with status {proc.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not listen on port {port} within {timeout}s")
+
+
+@contextmanager
+def serve(kind: str, port: int) -> Iterator[HTTPTarget]:
+    """Start server.run_<kind>() in a child process for the duration of the block."""
+    env = dict(os.environ, SMART_TRAVEL_PORT=str(port))
+    env.setdefault("SMART_TRAVEL_IP_RATE", "0")     # every simulated user shares one IP
+    # Server output goes to a file: Werkzeug logs every request, and an
+    # unread pipe would fill up and stall the server mid-run.
+    log = tempfile.TemporaryFile()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", f"import server; server.run_{kind}()"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        _wait_for_port(port, proc)
+        target = HTTPTarget(f"http://127.0.0.1:{port}", name=kind, pid=proc.pid)
+        try:
+            yield target
+        finally:
+            target.close()
+    except RuntimeError as e:
+        log.seek(0)
+        err = log.read().decode(errors="replace").strip()[-2000:]
+        raise RuntimeError(f"{kind}: {e}" + (f"\n{err}" if err else "")) from None
+    finally:
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGINT)    # exits through the server's finally blocks
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        log.close()
+
+
+# ── Measurement ───────────────────────────────────────────────
+
+def percentile(ordered: list[float], p: float) -> float:
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(latencies: list[float], elapsed: float, conversations: int, errors: int) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "conversations":  conversations,
+        "turns":          len(ordered),
+        "errors":         errors,
+        "turns_per_sec":  round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms":         round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms":         round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms":         round(percentile(ordered, 99) * 1000, 3),
+        "max_ms":         round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def converse(target, script: Script) -> tuple[list[float], bool]:
+    """One user through one script: per-turn latencies, and whether it ended as expected."""
+    turn = target.session()
+    latencies = []
+    responses: list = []
+    for message in script.messages:
+        t = time.perf_counter()
+        responses = turn(message)
+        latencies.append(time.perf_counter() - t)
+    ok = bool(responses) and responses[-1].get("type") == script.expect
+    return latencies, ok
+
+
+def run(target, scripts: list[Script], conversations: int, concurrency: int,
+        warmup: int) -> dict:
+    for i in range(warmup):
+        converse(target, scripts[i % len(scripts)])
+
+    per_script: dict[str, list[float]] = {s.name: [] for s in scripts}
+    counts = {s.name: 0 for s in scripts}
+    errors = {s.name: 0 for s in scripts}
+    lock = threading.Lock()
+
+    def job(i: int) -> None:
+        script = scripts[i % len(scripts)]
+        try:
+            latencies, ok = converse(target, script)
+        except Exception as e:
+            latencies, ok = [], False
+            print(f"  [{target.name}] {script.name}: {type(e).__name__}: {e}", file=sys.stderr)
+        with lock:
+            per_script[script.name] += latencies
+            counts[script.name] += 1
+            errors[script.name] += not ok
+
+    rss_before = rss_bytes(target.pid) if target.pid else None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(job, range(conversations)))
+    elapsed = time.perf_counter() - start
+    rss_after = rss_bytes(target.pid) if target.pid else None
+
+    result = summarize([x for v in per_script.values() for x in v], elapsed,
+                       conversations, sum(errors.values()))
+    result["elapsed_sec"] = round(elapsed, 3)
+    result["concurrency"] = concurrency
+    if rss_before is not None and rss_after is not None:
+        result["rss_mb"] = round(rss_after / 2**20, 1)
+        result["rss_per_session_kb"] = round((rss_after - rss_before) / conversations / 1024, 2)
+    result["scripts"] = {
+        name: summarize(sorted(lat), elapsed, counts[name], errors[name])
+        for name, lat in per_script.items()
+    }
+    for s in result["scripts"].values():
+        del s["turns_per_sec"]                 # scripts share the wall clock
+    return result
+
+
+def environment() -> dict:
+    try:
+        rev = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+    except OSError:
+        rev = ""
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "revision":  rev or None,
+        "python":    platform.python_version(),
+        "platform":  platform.platform(),
+        "cpus":      os.cpu_count(),
+        "env":       {k: v for k, v in os.environ.items() if k.startswith("SMART_TRAVEL_")},
+    }
+
+
+def print_result(name: str, r: dict) -> None:
+    rss = f"  rss/session {r['rss_per_session_kb']} KB" if "rss_per_session_kb" in r else ""
+    print(f"\n{name}: {r['turns']} turns in {r['elapsed_sec']}s  "
+          f"{r['turns_per_sec']} turns/s  errors {r['errors']}{rss}")
+    print(f"  {'script':<16}{'convs':>7}{'turns':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for script, s in list(r["scripts"].items()) + [("all", r)]:
+        print(f"  {script:<16}{s['conversations']:>7}{s['turns']:>8}"
+              f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['errors']:>8}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", action="append",
+                    help="engine | stdlib | flask | http://host:port (repeatable; default engine)")
+    ap.add_argument("--script", action="append", choices=sorted(BY_NAME),
+                    help="scripts to replay (repeatable; default all)")
+    ap.add_argument("--conversations", type=int, default=200, help="conversations per target")
+    ap.add_argument("--concurrency", type=int, default=8, help="simultaneous conversations")
+    ap.add_argument("--warmup", type=int, default=len(SCRIPTS), help="untimed conversations first")
+    ap.add_argument("--port", type=int, default=5055, help="port for servers started here")
+    ap.add_argument("--out", help="write results as JSON to this file")
+    args = ap.parse_args(argv)
+
+    scripts = [BY_NAME[n] for n in args.script] if args.script else list(SCRIPTS)
+    report = {"environment": environment(),
+              "config": {"conversations": args.conversations, "concurrency": args.concurrency,
+                         "warmup": args.warmup, "scripts": [s.name for s in scripts]},
+              "results": {}}
+
+    for name in args.target or ["engine"]:
+        if name == "engine":
+            target = EngineTarget()
+            report["results"][name] = run(target, scripts, args.conversations,
+                                          args.concurrency, args.warmup)
+            target.close()
+        elif name in ("stdlib", "flask"):
+            with serve(name, args.port) as target:
+                report["results"][name] = run(target, scripts, args.conversations,
+                                              args.concurrency, args.warmup)
+        elif name.startswith("http"):
+            target = HTTPTarget(name)
+            report["results"][name] = run(target, scripts, args.conversations,
+                                          args.concurrency, args.warmup)
+            target.close()
+        else:
+            ap.error(f"unknown target {name!r}")
+        print_result(name, report["results"][name])
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.out}")
+    return 1 if any(r["errors"] for r in report["results"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Benchmark Conversations -
+
+Scripted user turns replayed by bench.py. Each script ends in a known
+state; `expect` is the response type its last turn must produce, so a
+run that silently stops booking shows up as errors, not as a speedup.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Script:
+    name:     str
+    messages: tuple[str, ...]
+    expect:   str
+
+
+SCRIPTS = (
+    Script("flight_booking", (
+        "Book a flight from Delhi to Mumbai on 2026-03-20 for 2 passengers",
+        "Option 1",
+        "What is the baggage?",
+        "yes",
+        "Rahul Sharma",
+        "rahul@gmail.com",
+        "+91 9876543210",
+        "yes",
+    ), "booking_confirm"),
+
+    Script("hotel_booking", (
+        "Find hotels in Goa from 2026-04-01 to 2026-04-05 for 2 guests",
+        "What amenities does option 2 include?",
+        "option 2",
+        "yes",
+        "Anita Rao",
+        "anita@example.com",
+        "+91 9812345678",
+        "yes",
+    ), "booking_confirm"),
+
+    Script("service_switch", (
+        "I want to fly from Delhi to Mumbai",
+        "2026-03-20",
+        "2",
+        "Also check hotels in Mumbai",
+        "2026-03-20",
+        "2026-03-23",
+        "2",
+        "option 3",
+        "status",
+    ), "memory_snapshot"),
+
+    Script("invalidation", (
+        "Book a flight from Delhi to Goa on 2026-03-15 for 1 passenger",
+        "Actually change the date to 2026-03-22",
+        "option 1",
+        "yes",
+        "Priya Patel",
+        "p@x.io",
+        "+91 9999988888",
+        "yes",
+    ), "booking_confirm"),
+
+    Script("resume", (
+        "Book a flight from Delhi to Mumbai on 2026-03-20 for 1 passenger",
+        "option 1",
+        "Also check hotels in Mumbai",
+        "2026-03-20",
+        "2026-03-23",
+        "1",
+        "option 1",
+        "resume flight",
+        "option 2",
+        "yes",
+        "Vikram Singh",
+        "vikram@example.com",
+        "+91 9000000000",
+        "yes",
+    ), "booking_confirm"),
+)
+
+BY_NAME = {s.name: s for s in SCRIPTS}
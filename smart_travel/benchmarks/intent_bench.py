@@ -0,0 +1,145 @@
+"""
+Intent Benchmark -
+
+Runs classify() over the labeled messages in intent_corpus.py and reports
+speed and correctness together: messages per second, latency per intent,
+intent accuracy with a confusion list, and slot accuracy.
+
+Run from the smart_travel directory:
+
+  python benchmarks/intent_bench.py --repeat 200 --out intent.json
+  python benchmarks/intent_bench.py --engine ngram --model models/intent
+
+The classify() result cache is off unless --cache is given, so timings
+are of the classifier itself. --min-accuracy makes the exit status fail
+when intent accuracy drops below a baseline.
+"""
+from __future__ import annotations
+import argparse, json, sys, time
+from collections import Counter, defaultdict
+
+from bench import ROOT, environment, percentile      # also puts ROOT on sys.path
+from intent_corpus import CORPUS, Case
+
+from backend import intent
+
+
+def check(classify, case: Case) -> tuple[str, bool]:
+    """Predicted intent, and whether every labeled slot came out as labeled."""
+    r = classify(case.text, case.awaiting)
+    return r.intent, all(r.slots.get(k) == v for k, v in case.slots.items())
+
+
+def run(classify, cases: tuple[Case, ...], repeat: int) -> dict:
+    # ── Correctness (one pass; classify() is deterministic) ───
+    confusion: Counter = Counter()
+    errors = []
+    slots_ok = 0
+    for case in cases:
+        got, ok = check(classify, case)
+        confusion[case.intent, got] += 1
+        slots_ok += ok
+        if got != case.intent or not ok:
+            errors.append({"text": case.text, "awaiting": case.awaiting,
+                           "expected": case.intent, "got": got, "slots_ok": ok})
+
+    # ── Speed ─────────────────────────────────────────────────
+    latencies: dict[str, list[float]] = defaultdict(list)
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(repeat):
+        for case in cases:
+            t0 = clock()
+            classify(case.text, case.awaiting)
+            latencies[case.intent].append(clock() - t0)
+    elapsed = clock() - start
+
+    correct = sum(n for (want, got), n in confusion.items() if want == got)
+    every = sorted(t for ts in latencies.values() for t in ts)
+    per_intent = {}
+    for name in sorted(latencies):
+        ts = sorted(latencies[name])
+        right = confusion[name, name]
+        total = sum(n for (want, _), n in confusion.items() if want == name)
+        per_intent[name] = {
+            "cases":    total,
+            "accuracy": round(right / total, 3),
+            "p50_us":   round(percentile(ts, 50) * 1e6, 1),
+            "p95_us":   round(percentile(ts, 95) * 1e6, 1),
+        }
+    return {
+        "cases":         len(cases),
+        "messages":      len(every),
+        "elapsed_sec":   round(elapsed, 3),
+        "msgs_per_sec":  round(len(every) / elapsed, 1) if elapsed else 0.0,
+        "p50_us":        round(percentile(every, 50) * 1e6, 1),
+        "p95_us":        round(percentile(every, 95) * 1e6, 1),
+        "p99_us":        round(percentile(every, 99) * 1e6, 1),
+        "accuracy":      round(correct / len(cases), 4),
+        "slot_accuracy": round(slots_ok / len(cases), 4),
+        "intents":       per_intent,
+        "confusion":     [{"expected": w, "got": g, "count": n}
+                          for (w, g), n in sorted(confusion.items()) if w != g],
+        "errors":        errors,
+    }
+
+
+def print_result(r: dict, show_errors: bool) -> None:
+    print(f"{r['messages']} messages in {r['elapsed_sec']}s  {r['msgs_per_sec']} msgs/s  "
+          f"p50 {r['p50_us']}us  p95 {r['p95_us']}us  p99 {r['p99_us']}us")
+    print(f"intent accuracy {r['accuracy']:.1%}  slot accuracy {r['slot_accuracy']:.1%}  "
+          f"({r['cases']} cases)")
+    print(f"  {'intent':<16}{'cases':>7}{'accuracy':>10}{'p50 us':>10}{'p95 us':>10}")
+    for name, s in r["intents"].items():
+        print(f"  {name:<16}{s['cases']:>7}{s['accuracy']:>10.0%}{s['p50_us']:>10}{s['p95_us']:>10}")
+    if r["confusion"]:
+        print("confusion (expected → got):")
+        for c in r["confusion"]:
+            print(f"  {c['expected']:<16}→ {c['got']:<16}{c['count']:>4}")
+    if show_errors:
+        for e in r["errors"]:
+            slot = f" [awaiting {e['awaiting']}]" if e["awaiting"] else ""
+            print(f"  {e['text']!r}{slot}: expected {e['expected']}, got {e['got']}"
+                  f"{'' if e['slots_ok'] else ', slots wrong'}")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=200, help="timed passes over the corpus")
+    ap.add_argument("--engine", default="rules", help="classifier engine: rules | ngram")
+    ap.add_argument("--model", help="model directory for --engine ngram")
+    ap.add_argument("--cache", action="store_true", help="leave the classify() result cache on")
+    ap.add_argument("--min-accuracy", type=float, default=0.0,
+                    help="exit 1 if intent accuracy is below this fraction")
+    ap.add_argument("--errors", action="store_true", help="list every misclassified case")
+    ap.add_argument("--out", help="write results as JSON to this file")
+    args = ap.parse_args(argv)
+
+    if not args.cache:
+        intent.use_cache(0)
+    if args.engine == "ngram":
+        if not args.model:
+            ap.error("--engine ngram needs --model")
+        from backend.ngram import IntentModel
+        intent.ENGINES["ngram"] = IntentModel.load(args.model).classify
+    if args.engine not in intent.ENGINES:
+        ap.error(f"unknown engine {args.engine!r}")
+    classify = intent.ENGINES[args.engine]
+    for case in CORPUS:                 # warm imports, regexes and lazy tables
+        classify(case.text, case.awaiting)
+    result = run(classify, CORPUS, args.repeat)
+    print_result(result, args.errors)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"environment": environment(),
+                       "config": {"repeat": args.repeat, "cache": args.cache,
+                                  "engine": args.engine, "model": args.model},
+                       "result": result}, f, indent=2)
+        print(f"\nwrote {args.out}")
+    return 1 if result["accuracy"] < args.min_accuracy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Intent Corpus -
+
+Labeled user messages for intent_bench.py: the intent classify() should
+return and the slots it must extract (others may come along), optionally
+with the slot the engine is waiting for. Labels are what a person would
+expect, not what the classifier happens to do today, so a few entries
+are known misses and accuracy below 100% is the baseline, not a failure.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Case:
+    text:     str
+    intent:   str
+    slots:    dict          = field(default_factory=dict)
+    awaiting: Optional[str] = None
+
+
+def C(text: str, intent: str, awaiting: Optional[str] = None, **slots) -> Case:
+    return Case(text, intent, slots, awaiting)
+
+
+CORPUS = (
+    # ── Commands ──────────────────────────────────────────────
+    C("help", "help"),
+    C("commands", "help"),
+    C("what can you do", "help"),
+    C("status", "status"),
+    C("show memory", "status"),
+    C("where am i", "status"),
+    C("debug", "status"),
+
+    # ── Resume / cancel / confirm ─────────────────────────────
+    C("go back to my flight", "resume"),
+    C("resume hotel", "resume"),
+    C("switch back to the hotel booking", "resume"),
+    C("continue", "resume"),
+    C("return to previous search", "resume"),
+    C("cancel", "cancel"),
+    C("no", "cancel"),
+    C("never mind", "cancel"),
+    C("stop", "cancel"),
+    C("abort this", "cancel"),
+    C("yes", "confirm"),
+    C("yes please", "confirm"),
+    C("ok", "confirm"),
+    C("confirm", "confirm"),
+    C("sure, book it", "confirm"),
+    C("that's correct", "confirm"),
+    C("yep, proceed", "confirm"),
+    C("yes", "confirm", awaiting="passengers"),
+
+    # ── Questions about an offer ──────────────────────────────
+    C("What is the baggage?", "query_offer"),
+    C("what is the baggage allowance?", "query_offer"),
+    C("does option 2 include breakfast?", "query_offer", index=2),
+    C("What amenities does option 2 include?", "query_offer", index=2),
+    C("tell me about the cancellation policy", "query_offer"),
+    C("what amenities does the hotel have", "query_offer"),
+    C("is it refundable?", "query_offer"),
+    C("does option 1 have a refund policy", "query_offer", index=1),
+
+    # ── Selecting an offer ────────────────────────────────────
+    C("option 1", "select_offer", index=1),
+    C("Option 3", "select_offer", index=3),
+    C("2", "select_offer", index=2),
+    C("the second one", "select_offer", index=2),
+    C("choose option 3", "select_offer", index=3),
+    C("I'll take the first", "select_offer", index=1),
+    C("book option 2", "select_offer", index=2),
+    C("go with 3", "select_offer", index=3),
+    C("pick 1", "select_offer", index=1),
+
+    # ── Flight searches ───────────────────────────────────────
+    C("Book a flight from Delhi to Mumbai on 2026-03-20 for 2 passengers", "search_flight",
+      origin="DEL", destination="BOM", travel_date="2026-03-20", passengers="2"),
+    C("I want to fly from Bangalore to Chennai", "search_flight", origin="BLR", destination="MAA"),
+    C("flights from Pune to Goa tomorrow", "search_flight", origin="PNQ", destination="GOA"),
+    C("cheapest airfare delhi to kolkata", "search_flight", origin="DEL", destination="CCU"),
+    C("fly from Mumbai to Dubai on 2026-05-01", "search_flight",
+      origin="BOM", destination="DXB", travel_date="2026-05-01"),
+    C("any flights to Jaipur?", "search_flight", destination="JAI"),
+    C("book a plane ticket from Hyderabad to Delhi for 3 people", "search_flight",
+      origin="HYD", destination="DEL", passengers="3"),
+    C("flight from dehli to banglore", "search_flight", origin="DEL", destination="BLR"),
+    C("Book a flight from Delhi to Goa on 2026-03-15 for 1 passenger", "search_flight",
+      origin="DEL", destination="GOA", travel_date="2026-03-15", passengers="1"),
+    C("flying from new delhi to goa city on 12/05/2026", "search_flight",
+      origin="DEL", destination="GOA", travel_date="12/05/2026"),
+    C("need an air ticket bombay to calcutta for two adults", "search_flight",
+      origin="BOM", destination="CCU", passengers="2"),
+    C("I want to fly from Delhi to Mumbai", "search_flight", origin="DEL", destination="BOM"),
+
+    # ── Hotel searches ────────────────────────────────────────
+    C("Find hotels in Goa from 2026-04-01 to 2026-04-05 for 2 guests", "search_hotel",
+      city="GOA", checkin_date="2026-04-01", checkout_date="2026-04-05", guests="2"),
+    C("hotel in Mumbai", "search_hotel", city="BOM"),
+    C("hotel in goa", "search_hotel", city="GOA"),
+    C("I need a room in Jaipur", "search_hotel", city="JAI"),
+    C("resort in goa for 4 guests", "search_hotel", city="GOA", guests="4"),
+    C("book a stay in Kochi checkin 2026-06-10", "search_hotel",
+      city="COK", checkin_date="2026-06-10"),
+    C("Also check hotels in Mumbai", "search_hotel", city="BOM"),
+    C("deluxe room please", "search_hotel"),
+    C("accommodation in bengaluru for 3 people", "search_hotel", city="BLR", guests="3"),
+
+    # ── Changing a search ─────────────────────────────────────
+    C("Actually change the date to 2026-03-22", "update_param", travel_date="2026-03-22"),
+    C("change destination to Chennai", "update_param", destination="MAA"),
+    C("update guests to 3", "update_param", guests="3"),
+    C("make it 4 passengers instead", "update_param", passengers="4"),
+    C("wrong city, it's Pune", "update_param", city="PNQ"),
+    C("change the flight date to 2026-07-01", "update_param", travel_date="2026-07-01"),
+
+    # ── Details without a pending question ────────────────────
+    C("my name is Anita Rao", "provide_info", name="Anita Rao"),
+    C("rahul@gmail.com", "provide_info", email="rahul@gmail.com"),
+    C("+91 9876543210", "provide_info", phone="+91 9876543210"),
+    C("2026-03-20", "provide_info", travel_date="2026-03-20"),
+    C("Delhi", "provide_info", city="DEL"),
+    C("mumbai to goa", "provide_info", origin="BOM", destination="GOA"),
+    C("check-out 2026-04-05", "provide_info", checkout_date="2026-04-05"),
+
+    # ── Answers to the pending question ───────────────────────
+    C("4", "provide_info", awaiting="passengers", passengers="4"),
+    C("2", "provide_info", awaiting="guests", guests="2"),
+    C("two", "provide_info", awaiting="guests", guests="2"),
+    C("3 people", "provide_info", awaiting="passengers", passengers="3"),
+    C("2026-03-20", "provide_info", awaiting="travel_date", travel_date="2026-03-20"),
+    C("2026-04-01", "provide_info", awaiting="checkin_date", checkin_date="2026-04-01"),
+    C("2026-03-23", "provide_info", awaiting="checkout_date", checkout_date="2026-03-23"),
+    C("Mumbai", "provide_info", awaiting="destination", destination="BOM"),
+    C("Delhi", "provide_info", awaiting="origin", origin="DEL"),
+    C("Mumbia", "provide_info", awaiting="destination", destination="BOM"),
+    C("Shimla", "provide_info", awaiting="city", city="Shimla"),
+    C("Rahul Sharma", "provide_info", awaiting="name", name="Rahul Sharma"),
+    C("Priya Patel", "provide_info", awaiting="name", name="Priya Patel"),
+    C("Anita", "provide_info", awaiting="name", name="Anita"),
+    C("a@b.co", "provide_info", awaiting="email", email="a@b.co"),
+    C("my email is x@y.com", "provide_info", awaiting="email", email="x@y.com"),
+    C("+91 9812345678", "provide_info", awaiting="phone", phone="+91 9812345678"),
+
+    # ── Nothing to act on ─────────────────────────────────────
+    C("hi", "unknown"),
+    C("hello there", "unknown"),
+    C("thanks", "unknown"),
+    C("what's the weather like", "unknown"),
+    C("Rahul Sharma", "unknown"),
+    C("blah", "unknown"),
+)
@@ -0,0 +1,227 @@
+"""
+Inventory Benchmark -
+
+Builds synthetic flight schedules and hotel lists of increasing size and
+times searches against each (after one untimed pass, so offer records
+are warm).
+
+  flights  build time, column and index bytes per leg, search latency;
+           latency should stay flat as the schedule grows, since a search
+           only touches the legs of one route on one weekday
+  hotels   filtered, ordered queries ("4+ stars under ₹8,000 by rating")
+           through the sorted indexes, against a scan of the whole city
+
+Run from the smart_travel directory:
+
+  python benchmarks/inventory_bench.py --legs 2000 --legs 100000 --legs 500000
+  python benchmarks/inventory_bench.py --target hotels --per-city 200 --per-city 5000
+  python benchmarks/inventory_bench.py --legs 300000 --out inventory.json
+"""
+from __future__ import annotations
+import argparse, csv, datetime, gc, itertools, json, random, string, sys, time
+from array import array
+
+from bench import environment, percentile     # also puts ROOT on sys.path
+
+from backend.inventory import DEFAULT_AIRLINES, FlightInventory, HotelInventory
+
+DAYS = ("1234567",) * 6 + ("12345", "135", "246", "67")
+
+
+def airports(n: int) -> list[str]:
+    """n made-up three-letter codes, in a stable order."""
+    return ["".join(p) for p in itertools.islice(itertools.product(string.ascii_uppercase, repeat=3), n)]
+
+
+def flight_legs(n: int, codes: list[str], rules: list[tuple[str, str]], rnd: random.Random):
+    """n flights.csv-shaped rows: busy routes between hubs, a long tail elsewhere."""
+    hubs = codes[:max(2, len(codes) // 10)]
+    numbers = {}
+    for _ in range(n):
+        pick = hubs if rnd.random() < .5 else codes
+        origin, destination = rnd.sample(pick, 2)
+        airline, cabin = rnd.choice(rules)
+        numbers[airline] = number = numbers.get(airline, 0) % 9999 + 1
+        dep, mins = rnd.randrange(0, 1440, 5), rnd.randrange(50, 600, 5)
+        base = rnd.randrange(1500, 40000, 10)
+        yield {"airline": airline, "number": number, "origin": origin, "destination": destination,
+               "departure": f"{dep // 60:02d}:{dep % 60:02d}",
+               "arrival": f"{(dep + mins) % 1440 // 60:02d}:{(dep + mins) % 60:02d}",
+               "days": rnd.choice(DAYS), "stops": int(mins > 300), "cabin": cabin,
+               "base": base, "taxes": base // 5, "seats": rnd.choice((4, 12, 30, 60)),
+               "rating": round(rnd.uniform(3.2, 4.8), 1)}
+
+
+def column_bytes(inv: FlightInventory) -> int:
+    """Columns plus the route index (records built for offers are not counted)."""
+    size = sum(sys.getsizeof(v) for v in vars(inv).values() if isinstance(v, array))
+    size += sys.getsizeof(inv._index)
+    lists = {}
+    for key, days in inv._index.items():
+        size += sys.getsizeof(key) + sys.getsizeof(days)
+        lists.update((id(a), a) for a in days)
+    return size + sum(map(sys.getsizeof, lists.values()))
+
+
+def run(legs: int, queries: int, passengers: int, limit: int, seed: int) -> dict:
+    rnd = random.Random(seed)
+    with open(DEFAULT_AIRLINES, newline="", encoding="utf-8") as f:
+        airlines = list(csv.DictReader(f))
+    rules = [(a["code"], a["cabin"]) for a in airlines]
+    codes = airports(max(20, min(400, legs // 100)))       # a big network, not more routes
+    rows  = list(flight_legs(legs, codes, rules, rnd))
+
+    gc.collect()
+    t0 = time.perf_counter()
+    inv = FlightInventory(airlines, rows)
+    build = time.perf_counter() - t0
+
+    routes = inv.routes()
+    start  = datetime.date(2026, 3, 1)
+    asks   = [(*rnd.choice(routes), (start + datetime.timedelta(days=rnd.randrange(90))).isoformat())
+              for _ in range(queries)]
+    for o, d, day in asks:                  # untimed pass: a leg's record is built on first match
+        inv.search(o, d, day, passengers, limit)
+    latencies, found = [], 0
+    clock = time.perf_counter
+    for o, d, day in asks:
+        t = clock()
+        found += len(inv.search(o, d, day, passengers, limit))
+        latencies.append(clock() - t)
+    latencies.sort()
+    return {
+        "legs":         legs,
+        "routes":       len(routes),
+        "build_sec":    round(build, 3),
+        "bytes_per_leg": round(column_bytes(inv) / legs, 1),
+        "queries":      queries,
+        "mean_offers":  round(found / queries, 2),
+        "p50_us":       round(percentile(latencies, 50) * 1e6, 1),
+        "p95_us":       round(percentile(latencies, 95) * 1e6, 1),
+        "p99_us":       round(percentile(latencies, 99) * 1e6, 1),
+    }
+
+
+# ── Hotels ────────────────────────────────────────────────────
+
+HOTEL_QUERIES = (
+    {"sort": "price"},
+    {"sort": "rating", "min_stars": 4, "max_price": 8000},
+    {"sort": "stars", "min_rating": 4.5},
+    {"sort": "price", "min_stars": 5, "min_rating": 4.0},
+    {"sort": "rating", "max_price": 2500},
+)
+
+
+def hotel_rows(per_city: int, cities: list[str], rnd: random.Random):
+    n = 0
+    for city in cities:
+        for _ in range(per_city):
+            n += 1
+            stars = rnd.choice((2, 3, 3, 4, 4, 5))
+            yield {"id": f"S{n}", "city": city, "name": f"Hotel {n}", "stars": stars,
+                   "location": "Centre", "room_type": "Standard Room",
+                   "price_per_night": int(rnd.uniform(.6, 1.6) * 1500 * stars) // 50 * 50,
+                   "rating": round(min(4.9, max(2.5, rnd.gauss(3.1 + stars * .3, .35))), 1),
+                   "reviews": rnd.randrange(5000), "breakfast_included": "yes",
+                   "cancellation_policy": "Free cancellation up to 24h before check-in.",
+                   "amenities": "Free Wi-Fi|Restaurant", "highlights": "Modern", "rooms": 10}
+
+
+def scan(inv: HotelInventory, city: str, q: dict, limit: int) -> list[int]:
+    """The same query without indexes: test every hotel in the city, then sort."""
+    price, stars, rating = inv._price, inv._stars, inv._rating
+    c = inv._cities.index(city)
+    hits = [i for i in range(len(inv)) if inv._city[i] == c
+            and price[i] <= q.get("max_price", 1 << 31) and stars[i] >= q.get("min_stars", 0)
+            and rating[i] >= round(q.get("min_rating", 0) * 10)]
+    return sorted(hits, key=inv._sort_key(q["sort"]))[:limit]
+
+
+def run_hotels(per_city: int, queries: int, limit: int, seed: int) -> dict:
+    rnd = random.Random(seed)
+    cities = airports(20)
+    rows = list(hotel_rows(per_city, cities, rnd))
+    t0 = time.perf_counter()
+    inv = HotelInventory(rows)
+    build = time.perf_counter() - t0
+
+    asks = [(rnd.choice(cities), rnd.choice(HOTEL_QUERIES)) for _ in range(queries)]
+    for city, q in asks:
+        inv.search(city, "2026-04-01", "2026-04-04", 2, limit=limit, **q)
+    clock = time.perf_counter
+    indexed, scanned, mismatches = [], [], 0
+    for city, q in asks:
+        t = clock()
+        offers = inv.search(city, "2026-04-01", "2026-04-04", 2, limit=limit, **q)
+        indexed.append(clock() - t)
+    for city, q in asks[:max(1, queries // 10)]:          # scans are slow; a sample will do
+        t = clock()
+        want = scan(inv, city, q, limit)
+        scanned.append(clock() - t)
+        mismatches += want != inv.query(city, limit=limit, **q)
+    indexed.sort()
+    scanned.sort()
+    return {
+        "hotels":        len(inv),
+        "per_city":      per_city,
+        "build_sec":     round(build, 3),
+        "queries":       queries,
+        "p50_us":        round(percentile(indexed, 50) * 1e6, 1),
+        "p95_us":        round(percentile(indexed, 95) * 1e6, 1),
+        "scan_p50_us":   round(percentile(scanned, 50) * 1e6, 1),
+        "mismatches":    mismatches,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[1],
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--target", action="append", choices=("flights", "hotels"),
+                    help="inventories to benchmark (repeatable; default both)")
+    ap.add_argument("--legs", type=int, action="append",
+                    help="schedule size (repeatable; default 2000, 100000, 500000)")
+    ap.add_argument("--per-city", type=int, action="append",
+                    help="hotels per city, 20 cities (repeatable; default 200, 2000, 10000)")
+    ap.add_argument("--queries", type=int, default=5000, help="timed searches per inventory")
+    ap.add_argument("--passengers", type=int, default=2)
+    ap.add_argument("--limit", type=int, default=5, help="offers returned per search")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write results as JSON to this file")
+    args = ap.parse_args(argv)
+
+    targets = args.target or ["flights", "hotels"]
+    results = {}
+    if "flights" in targets:
+        results["flights"] = []
+        print(f"{'legs':>9}{'routes':>8}{'build s':>9}{'B/leg':>8}{'offers':>8}"
+              f"{'p50 us':>9}{'p95 us':>9}{'p99 us':>9}")
+        for n in args.legs or (2000, 100_000, 500_000):
+            r = run(n, args.queries, args.passengers, args.limit, args.seed)
+            results["flights"].append(r)
+            print(f"{r['legs']:>9}{r['routes']:>8}{r['build_sec']:>9}{r['bytes_per_leg']:>8}"
+                  f"{r['mean_offers']:>8}{r['p50_us']:>9}{r['p95_us']:>9}{r['p99_us']:>9}")
+    if "hotels" in targets:
+        results["hotels"] = []
+        if "flights" in results:
+            print()
+        print(f"{'hotels':>9}{'/city':>8}{'build s':>9}{'p50 us':>9}{'p95 us':>9}"
+              f"{'scan p50':>10}{'wrong':>7}")
+        for n in args.per_city or (200, 2000, 10_000):
+            r = run_hotels(n, args.queries, args.limit, args.seed)
+            results["hotels"].append(r)
+            print(f"{r['hotels']:>9}{r['per_city']:>8}{r['build_sec']:>9}{r['p50_us']:>9}"
+                  f"{r['p95_us']:>9}{r['scan_p50_us']:>10}{r['mismatches']:>7}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"environment": environment(),
+                       "config": {"queries": args.queries, "passengers": args.passengers,
+                                  "limit": args.limit, "seed": args.seed},
+                       "results": results}, f, indent=2)
+        print(f"\nwrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
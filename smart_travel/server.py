@@ -4,149 +4,427 @@ Smart Travel Companion — Web Server -
 Run: python server.py
 Open: http://localhost:5000
 
-Works with OR without Flask installed.
+Works with OR without Flask installed. Behind a production server use
+the module-level callables instead:
+
+  gunicorn --threads 32 'server:wsgi'
+  uvicorn server:asgi
 """
-import sys, os, json
+import sys, os, atexit, threading
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from backend import api, intent
+from backend.app import App, Headers, Request, query_dict
 from backend.engine import TravelEngine
+from backend.gazetteer import DEFAULT_PATH as DEFAULT_AIRPORTS, Gazetteer
+from backend.inventory import DEFAULT_AIRLINES, DEFAULT_FLIGHTS, FlightInventory, HotelInventory
+from backend.limits import Limits
+from backend.metrics import REJECTED
+from backend.persistence import SQLiteBackend
+from backend.sessions import SessionStore
+from backend.workers import WorkerPool
+from backend.web import StaticFiles
+
+FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+PORT     = int(os.environ.get("SMART_TRAVEL_PORT", 5000))
+
+# Request-handling threads for the stdlib server (and for blocking handlers
+# under ASGI). Turns for different sessions run in parallel; one session's
+# turns are serialized by its lock.
+THREADS = int(os.environ.get("SMART_TRAVEL_THREADS", 32))
+
+# Session store bounds: LRU cap on live engines and idle expiry in seconds.
+MAX_SESSIONS = int(os.environ.get("SMART_TRAVEL_MAX_SESSIONS", 10_000))
+SESSION_TTL  = float(os.environ.get("SMART_TRAVEL_SESSION_TTL", 1800))
+
+# Engine processes. Above 1, sessions are hashed to pre-forked workers so
+# classification and routing use every core; bounds above apply per worker.
+WORKERS = int(os.environ.get("SMART_TRAVEL_WORKERS", 1))
+
+# Durable sessions: SQLite file written behind every FLUSH_INTERVAL seconds
+# and read back lazily after a restart. Empty disables persistence.
+SESSION_DB     = os.environ.get("SMART_TRAVEL_SESSION_DB", "")
+FLUSH_INTERVAL = float(os.environ.get("SMART_TRAVEL_FLUSH_INTERVAL", 1.0))
+
+# /api/chat/batch: most messages per request, and threads shared by all
+# batches for running independent sessions in parallel.
+BATCH_MAX     = int(os.environ.get("SMART_TRAVEL_BATCH_MAX", 500))
+BATCH_THREADS = int(os.environ.get("SMART_TRAVEL_BATCH_THREADS", 8))
+
+# Longest /api/memory?wait=… long-poll, in seconds. Each waiter holds a
+# request thread, so keep this well below what THREADS can absorb.
+MEMORY_WAIT_MAX = float(os.environ.get("SMART_TRAVEL_MEMORY_WAIT_MAX", 25))
+
+# Keep-alive on the stdlib server: idle connections wait in a selector,
+# not on a request thread, for up to KEEPALIVE_TIMEOUT seconds; past
+# MAX_KEEPALIVE idle connections the oldest are closed.
+KEEPALIVE_TIMEOUT = float(os.environ.get("SMART_TRAVEL_KEEPALIVE_TIMEOUT", 15))
+MAX_KEEPALIVE     = int(os.environ.get("SMART_TRAVEL_MAX_KEEPALIVE", 1024))
+
+# Chat rate limits as token buckets (turns per second, burst) per session
+# and per client IP; batches charge the IP one token per message. 0 disables.
+SESSION_RATE  = float(os.environ.get("SMART_TRAVEL_SESSION_RATE", 5))
+SESSION_BURST = float(os.environ.get("SMART_TRAVEL_SESSION_BURST", 20))
+IP_RATE       = float(os.environ.get("SMART_TRAVEL_IP_RATE", 100))
+IP_BURST      = float(os.environ.get("SMART_TRAVEL_IP_BURST", 400))
+
+# Load shedding: chat requests in flight at once, how many more may wait
+# for a slot and for how long (seconds) before getting a 503. The stdlib
+# server also refuses connections once MAX_QUEUE are waiting for a thread.
+MAX_ACTIVE    = int(os.environ.get("SMART_TRAVEL_MAX_ACTIVE", 32))
+MAX_QUEUE     = int(os.environ.get("SMART_TRAVEL_MAX_QUEUE", 128))
+QUEUE_TIMEOUT = float(os.environ.get("SMART_TRAVEL_QUEUE_TIMEOUT", 2.0))
+
+# Extra city/airport names for the classifier: a CSV of iata,city,country,
+# aliases (e.g. a full global export) loaded after backend/data/airports.csv.
+AIRPORTS = os.environ.get("SMART_TRAVEL_AIRPORTS", "")
+
+# classify() results kept per process for repeated messages ("yes", "2",
+# "option 1"), keyed on text and the slot being asked for. 0 disables.
+CLASSIFY_CACHE = int(os.environ.get("SMART_TRAVEL_CLASSIFY_CACHE", 10_000))
+
+# Intent classifier engine: "rules" (the keyword cascade) or "ngram", a
+# linear model over hashed n-grams read from INTENT_MODEL (needs numpy;
+# train one with `python -m backend.ngram train …`).
+INTENT_ENGINE = os.environ.get("SMART_TRAVEL_INTENT_ENGINE", "rules")
+INTENT_MODEL  = os.environ.get("SMART_TRAVEL_INTENT_MODEL", "")
+
+# Flight schedule and airline fare rules (CSV, see backend/inventory.py);
+# empty → the bundled demo schedule in backend/data/.
+FLIGHTS  = os.environ.get("SMART_TRAVEL_FLIGHTS", "")
+AIRLINES = os.environ.get("SMART_TRAVEL_AIRLINES", "")
+# Hotel list (CSV, one row per property), likewise.
+HOTELS   = os.environ.get("SMART_TRAVEL_HOTELS", "")
+
+# Search results shared by all sessions of a worker: at most SEARCH_CACHE
+# searches, each kept SEARCH_TTL seconds (inventory is read-only, so
+# nothing else expires them). 0 disables.
+SEARCH_CACHE = int(os.environ.get("SMART_TRAVEL_SEARCH_CACHE", 10_000))
+SEARCH_TTL   = float(os.environ.get("SMART_TRAVEL_SEARCH_TTL", 300))
+
+
+def configure_classifier() -> None:
+    """Process-wide classifier setup; runs before workers fork so they inherit it."""
+    intent.use_cache(CLASSIFY_CACHE)
+    if AIRPORTS:
+        intent.use_gazetteer(Gazetteer.load(DEFAULT_AIRPORTS, AIRPORTS))
+    if INTENT_ENGINE == "ngram":
+        from backend.ngram import IntentModel        # needs numpy
+        intent.ENGINES["ngram"] = IntentModel.load(INTENT_MODEL).classify
+    if INTENT_ENGINE not in intent.ENGINES:
+        raise SystemExit(f"SMART_TRAVEL_INTENT_ENGINE: unknown engine {INTENT_ENGINE!r}")
+    TravelEngine.classifier = INTENT_ENGINE
+
+
+def configure_inventory() -> None:
+    """Load non-default inventory once, before workers fork."""
+    api.use_search_cache(SEARCH_CACHE, SEARCH_TTL)
+    if FLIGHTS or AIRLINES:
+        api.use_flights(FlightInventory.load(FLIGHTS or DEFAULT_FLIGHTS, AIRLINES or DEFAULT_AIRLINES))
+    if HOTELS:
+        api.use_hotels(HotelInventory.load(HOTELS))
+
+
+def configure() -> None:
+    """Everything an engine process needs; restarted workers run it again."""
+    configure_classifier()
+    configure_inventory()
+
+
+def make_sessions():
+    """In-process store, or a pre-forked pool when WORKERS > 1."""
+    configure()
+    kwargs = dict(max_size=MAX_SESSIONS, idle_ttl=SESSION_TTL, flush_interval=FLUSH_INTERVAL)
+    if WORKERS > 1:
+        return WorkerPool(WORKERS, session_db=SESSION_DB or None, setup=configure, **kwargs)
+    backend = SQLiteBackend(SESSION_DB) if SESSION_DB else None
+    return SessionStore(backend=backend, **kwargs)
+
+
+def make_limits() -> Limits:
+    return Limits(SESSION_RATE, SESSION_BURST, IP_RATE, IP_BURST,
+                  MAX_ACTIVE, MAX_QUEUE, QUEUE_TIMEOUT)
+
+
+def make_app() -> App:
+    return App(make_sessions(), StaticFiles(FRONTEND), make_limits(),
+               batch_max=BATCH_MAX, batch_threads=BATCH_THREADS,
+               memory_wait_max=MEMORY_WAIT_MAX, threads=THREADS)
+
+
+# ── WSGI / ASGI entry points ──────────────────────────────────
+# Built on first request, i.e. inside each server worker process after
+# it has forked. Sessions live in that process: run one server process
+# (scale with SMART_TRAVEL_WORKERS) or route each session_id to the same
+# process at the load balancer.
+
+_app = None
+_app_lock = threading.Lock()
+
+
+def get_app() -> App:
+    global _app
+    with _app_lock:
+        if _app is None:
+            _app = make_app()
+            atexit.register(_app.close)
+    return _app
+
+
+def wsgi(environ, start_response):
+    return get_app().wsgi(environ, start_response)
+
+
+async def asgi(scope, receive, send):
+    await get_app().asgi(scope, receive, send)
+
+
+# ── Built-in servers ──────────────────────────────────────────
 
 try:
-    from flask import Flask, request, jsonify, send_from_directory
+    from flask import Flask
     HAS_FLASK = True
 except ImportError:
     HAS_FLASK = False
 
 
 def run_flask():
-    app = Flask(__name__, static_folder="frontend", static_url_path="")
-
-    @app.after_request
-    def cors(response):
-        response.headers["Access-Control-Allow-Origin"]  = "*"
-        response.headers["Access-Control-Allow-Headers"] = "Content-Type"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-        return response
-
-    sessions = {}
-
-    def get_engine(sid):
-        if sid not in sessions:
-            sessions[sid] = TravelEngine()
-        return sessions[sid]
-
-    @app.route("/")
-    def index():
-        return send_from_directory("frontend", "index.html")
-
-    @app.route("/api/chat", methods=["POST", "OPTIONS"])
-    def chat():
-        if request.method == "OPTIONS":
-            return "", 204
-        data = request.get_json()
-        sid  = data.get("session_id", "default")
-        msg  = data.get("message", "").strip()
-        if not msg:
-            return jsonify({"responses": []})
-        resp = get_engine(sid).process(msg)
-        return jsonify({"responses": resp})
-
-    @app.route("/api/memory")
-    def memory():
-        sid = request.args.get("session_id", "default")
-        return jsonify(get_engine(sid).get_memory_snapshot())
-
-    @app.route("/api/reset", methods=["POST", "OPTIONS"])
-    def reset():
-        if request.method == "OPTIONS":
-            return "", 204
-        sid = request.get_json().get("session_id", "default")
-        sessions.pop(sid, None)
-        return jsonify({"ok": True})
+    app = make_app()    # fork workers before Flask starts any threads
+    flask_app = Flask(__name__, static_folder=None)
+    flask_app.wsgi_app = app.wsgi
 
     print("\n" + "-"*50)
     print("  Smart Travel Companion")
-    print("  Open: http://localhost:5000")
+    print(f"  Open: http://localhost:{PORT}  ({WORKERS} worker(s))")
     print("-"*50 + "\n")
-    app.run(debug=False, port=5000, host="0.0.0.0")
+    # Werkzeug's development server always answers "Connection: close";
+    # keep-alive on this path comes from the WSGI server in front of it.
+    try:
+        flask_app.run(debug=False, port=PORT, host="0.0.0.0", threaded=True)
+    finally:
+        app.close()
 
 
 def run_stdlib():
     from http.server import HTTPServer, BaseHTTPRequestHandler
-    import urllib.parse
+    from concurrent.futures import ThreadPoolExecutor
+    from collections import OrderedDict
+    import selectors, socket, time
 
-    sessions = {}
+    app = make_app()
 
-    def get_engine(sid):
-        if sid not in sessions:
-            sessions[sid] = TravelEngine()
-        return sessions[sid]
+    class Handler(BaseHTTPRequestHandler):
+        """
+        One keep-alive connection. Unlike the stock handler it does not
+        loop over requests on its thread: serve() answers what the client
+        has already sent and hands the connection back to the server.
+        """
+        protocol_version = "HTTP/1.1"     # keep-alive; every response sets Content-Length
+        disable_nagle_algorithm = True    # headers and body go out as separate writes
+        timeout = 5                       # for a request that has started to arrive
 
-    BASE = os.path.dirname(os.path.abspath(__file__))
+        def __init__(self, request, client_address, server):
+            self.request        = request
+            self.client_address = client_address
+            self.server         = server
+            self.setup()
 
-    class Handler(BaseHTTPRequestHandler):
         def log_message(self, fmt, *args): pass
 
-        def send_cors(self):
-            self.send_header("Access-Control-Allow-Origin", "*")
-            self.send_header("Access-Control-Allow-Headers", "Content-Type")
-            self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        def serve(self) -> bool:
+            """Answer the requests waiting on the socket; False once it should close."""
+            self.close_connection = True
+            self.handle_one_request()
+            while not self.close_connection and self._buffered():
+                self.handle_one_request()           # pipelined
+            return not self.close_connection
 
-        def do_OPTIONS(self):
-            self.send_response(204); self.send_cors(); self.end_headers()
+        def _buffered(self) -> bool:
+            self.connection.settimeout(0)
+            try:
+                return bool(self.rfile.peek(1))
+            except OSError:
+                return False
+            finally:
+                self.connection.settimeout(self.timeout)
 
         def do_GET(self):
-            path = self.path.split("?")[0]
-            if path in ("/", "/index.html"):
-                self._file(os.path.join(BASE, "frontend", "index.html"), "text/html; charset=utf-8")
-            elif path == "/api/memory":
-                qs  = urllib.parse.parse_qs(self.path.split("?",1)[-1]) if "?" in self.path else {}
-                sid = qs.get("session_id", ["default"])[0]
-                self._json(get_engine(sid).get_memory_snapshot())
-            else:
-                self.send_error(404)
-
-        def do_POST(self):
-            path   = self.path.split("?")[0]
+            path, _, qs = self.path.partition("?")
             length = int(self.headers.get("Content-Length", 0))
-            body   = json.loads(self.rfile.read(length)) if length else {}
-            if path == "/api/chat":
-                sid  = body.get("session_id", "default")
-                msg  = body.get("message", "").strip()
-                resp = get_engine(sid).process(msg) if msg else []
-                self._json({"responses": resp})
-            elif path == "/api/reset":
-                sessions.pop(body.get("session_id", "default"), None)
-                self._json({"ok": True})
-            else:
-                self.send_error(404)
-
-        def _file(self, path, ct):
+            req = Request(
+                method  = self.command,
+                path    = path,
+                query   = query_dict(qs),
+                headers = Headers(self.headers.items()),
+                body    = self.rfile.read(length) if length > 0 else b"",
+                client  = self.client_address[0],
+            )
+            resp = app.handle(req)
+            try:
+                self.send_response(resp.status)
+                for k, v in resp.headers.items():
+                    self.send_header(k, v)
+                if resp.streaming:
+                    # Server-Sent Events: chunked, flushed per event.
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for chunk in resp.body:
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.send_header("Content-Length", str(len(resp.body)))
+                    self.end_headers()
+                    if self.command != "HEAD":
+                        self.wfile.write(resp.body)
+            finally:
+                resp.close()
+
+        do_POST = do_OPTIONS = do_HEAD = do_GET
+
+    class PooledHTTPServer(HTTPServer):
+        """
+        HTTPServer whose main thread accepts connections and watches every
+        idle one with a selector; only a connection with a request ready
+        is handed to the bounded thread pool, so idle keep-alive clients
+        never hold a thread. Once `max_queue` requests are already waiting
+        for a thread, new ones get an immediate 503 instead of an ever
+        longer wait.
+        """
+        request_queue_size = 128
+        OVERLOADED = (b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                      b"Content-Length: 0\r\nConnection: close\r\n\r\n")
+
+        def __init__(self, addr, handler, threads, max_queue, idle_timeout, max_idle):
+            super().__init__(addr, handler)
+            self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="http")
+            self._threads   = threads
+            self._max_queue = max_queue
+            self._pending   = 0          # handed to the pool, not yet finished
+            self._lock      = threading.Lock()
+            self._idle_timeout = idle_timeout
+            self._max_idle  = max_idle
+            self._idle: OrderedDict[Handler, float] = OrderedDict()   # oldest first
+            self._returned: list[Handler] = []                        # by pool threads
+            self._selector  = selectors.DefaultSelector()
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+
+        def serve_forever(self, poll_interval=1.0):
+            sel = self._selector
+            sel.register(self.socket, selectors.EVENT_READ)
+            sel.register(self._wake_r, selectors.EVENT_READ)
+            while True:
+                for key, _ in sel.select(poll_interval):
+                    if key.fileobj is self.socket:
+                        self._accept()
+                    elif key.fileobj is self._wake_r:
+                        self._take_returned()
+                    else:
+                        self._dispatch(key.data)
+                self._close_idle(time.monotonic() - self._idle_timeout)
+
+        def _accept(self):
+            try:
+                request, client_address = self.get_request()
+            except OSError:
+                return
+            # Nothing has been read yet: wait for the request like any idle connection.
+            self._park(self.RequestHandlerClass(request, client_address, self))
+
+        def _park(self, conn: Handler):
+            self._idle[conn] = time.monotonic()
+            self._selector.register(conn.connection, selectors.EVENT_READ, conn)
+            if len(self._idle) > self._max_idle:
+                self._close(next(iter(self._idle)))
+
+        def _take_returned(self):
             try:
-                data = open(path, "rb").read()
-                self.send_response(200)
-                self.send_header("Content-Type", ct)
-                self.send_cors(); self.end_headers()
-                self.wfile.write(data)
-            except FileNotFoundError:
-                self.send_error(404)
-
-        def _json(self, obj):
-            data = json.dumps(obj, default=str).encode()
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.send_cors(); self.end_headers()
-            self.wfile.write(data)
-
-    server = HTTPServer(("0.0.0.0", 5000), Handler)
+                while self._wake_r.recv(4096):
+                    pass
+            except BlockingIOError:
+                pass
+            with self._lock:
+                returned, self._returned = self._returned, []
+            for conn in returned:
+                self._park(conn)
+
+        def _close_idle(self, before: float):
+            while self._idle:
+                conn, since = next(iter(self._idle.items()))
+                if since > before:
+                    break
+                self._close(conn)
+
+        def _close(self, conn: Handler):
+            del self._idle[conn]
+            self._selector.unregister(conn.connection)
+            self._finish(conn)
+
+        def _dispatch(self, conn: Handler):
+            del self._idle[conn]
+            self._selector.unregister(conn.connection)
+            with self._lock:
+                shed = self._pending >= self._threads + self._max_queue
+                if not shed:
+                    self._pending += 1
+            if shed:
+                REJECTED.inc("overloaded")
+                try:
+                    conn.connection.sendall(self.OVERLOADED)
+                except OSError:
+                    pass
+                self._finish(conn)
+                return
+            self._pool.submit(self._serve, conn)
+
+        def _serve(self, conn: Handler):
+            keep = False
+            try:
+                keep = conn.serve()
+            except Exception:
+                self.handle_error(conn.connection, conn.client_address)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    if keep:
+                        self._returned.append(conn)
+                if keep:
+                    self._wake_w.send(b"x")
+                else:
+                    self._finish(conn)
+
+        def _finish(self, conn: Handler):
+            try:
+                conn.finish()
+            except OSError:
+                pass
+            self.shutdown_request(conn.connection)
+
+        def server_close(self):
+            super().server_close()
+            self._pool.shutdown(wait=False)
+            for conn in list(self._idle):
+                self._close(conn)
+            self._selector.close()
+
+    server = PooledHTTPServer(("0.0.0.0", PORT), Handler, THREADS, MAX_QUEUE,
+                              KEEPALIVE_TIMEOUT, MAX_KEEPALIVE)
     print("\n" + "-"*50)
     print("  Smart Travel Companion (no Flask needed)")
-    print("  Open: http://localhost:5000")
+    print(f"  Open: http://localhost:{PORT}  ({THREADS} threads, {WORKERS} worker(s))")
     print("-"*50 + "\n")
-    server.serve_forever()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        app.close()
 
 
 if __name__ == "__main__":
+    import signal
+    # Deploys stop us with SIGTERM; exit through the finally blocks so
+    # pending session writes are flushed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
     if HAS_FLASK:
         run_flask()
     else:
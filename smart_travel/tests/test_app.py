@@ -0,0 +1,67 @@
+"""
+App routes: malformed chat bodies, and /api/memory revalidation per
+content-coding.
+
+Run from the smart_travel directory:
+
+  python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import gzip, json, tempfile, unittest
+from unittest import mock
+
+from backend.app import App, Headers, Request
+from backend.limits import Limits
+from backend.sessions import SessionStore
+from backend.web import StaticFiles
+
+
+class AppTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = App(SessionStore(), StaticFiles(tempfile.mkdtemp()), Limits(0, 0, 0, 0, 0, 0, 0))
+        self.addCleanup(self.app.close)
+
+    def request(self, method: str, path: str, body=None, headers=(), **query):
+        data = json.dumps(body).encode() if body is not None else b""
+        return self.app.handle(Request(method, path, query, Headers(headers), data, client="ip"))
+
+
+class ChatTest(AppTestCase):
+    def test_message_must_be_a_string(self):
+        for path in ("/api/chat", "/api/chat/stream"):
+            for message in (5, None, ["hi"], {"text": "hi"}):
+                with self.subTest(path=path, message=message):
+                    resp = self.request("POST", path, {"session_id": "a", "message": message})
+                    self.assertEqual(resp.status, 400)
+                    self.assertEqual(json.loads(resp.body), {"error": "'message' must be a string"})
+
+    def test_chat(self):
+        resp = self.request("POST", "/api/chat", {"session_id": 7, "message": "  hi  "})
+        self.assertEqual(resp.status, 200)
+        self.assertEqual(json.loads(resp.body)["responses"][0]["type"], "message")
+        self.assertEqual(self.app.sessions.stats()["sessions"], 1)
+
+    def test_unexpected_error_is_not_echoed(self):
+        with mock.patch.object(self.app.sessions, "process", side_effect=KeyError("secret")), \
+                mock.patch("backend.app.traceback.print_exc"):
+            resp = self.request("POST", "/api/chat", {"message": "hi"})
+        self.assertEqual((resp.status, json.loads(resp.body)), (500, {"error": "internal server error"}))
+
+
+class MemoryTest(AppTestCase):
+    def test_each_encoding_has_its_own_etag(self):
+        self.request("POST", "/api/chat", {"session_id": "a", "message": "flight from delhi to mumbai"})
+        with mock.patch("backend.web.GZIP_MIN_BYTES", 0):
+            plain = self.request("GET", "/api/memory", session_id="a")
+            gz = self.request("GET", "/api/memory", headers=[("Accept-Encoding", "gzip")], session_id="a")
+            self.assertEqual(gz.headers["Content-Encoding"], "gzip")
+            self.assertEqual(json.loads(gzip.decompress(gz.body)), json.loads(plain.body))
+            self.assertEqual(gz.headers["ETag"], plain.headers["ETag"][:-1] + '-gz"')
+
+            for resp, enc in ((plain, ()), (gz, [("Accept-Encoding", "gzip")])):
+                again = self.request("GET", "/api/memory", session_id="a",
+                                     headers=[("If-None-Match", resp.headers["ETag"]), *enc])
+                self.assertEqual((again.status, again.headers["ETag"]), (304, resp.headers["ETag"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
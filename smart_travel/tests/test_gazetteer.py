@@ -0,0 +1,59 @@
+"""
+Gazetteer typo lookup: real typos resolve, unknown places are left alone.
+
+Run from the smart_travel directory:
+
+  python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import unittest
+
+from backend.gazetteer import Gazetteer, levenshtein, max_edits, transposed
+
+
+class FuzzyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.g = Gazetteer.load()
+
+    def test_typos_resolve(self):
+        for typo, code in [("dehli", "DEL"), ("mumbia", "BOM"), ("chenai", "MAA"),
+                           ("banglore", "BLR"), ("hydrabad", "HYD"), ("kolkatta", "CCU")]:
+            with self.subTest(typo=typo):
+                self.assertEqual(self.g.fuzzy(typo), code)
+
+    def test_unknown_places_are_not_guessed(self):
+        # Each is within two edits of some listed city; none is that city.
+        for name in ("manali", "hampi", "male", "poona"):
+            with self.subTest(name=name):
+                self.assertIsNone(self.g.fuzzy(name))
+
+    def test_tie_between_airports_is_no_match(self):
+        g = Gazetteer([("AAA", "Marana", "", []), ("BBB", "Barina", "", [])])
+        self.assertIsNone(g.fuzzy("marina"))          # one edit from each
+        g = Gazetteer([("AAA", "Marana", "", ["barina"])])
+        self.assertEqual(g.fuzzy("marina"), "AAA")    # both names, one airport
+
+    def test_short_names_match_exactly(self):
+        self.assertEqual(max_edits("male"), 0)
+        self.assertEqual(max_edits("hampi"), 1)
+        self.assertEqual(max_edits("bangalroe"), 2)
+        self.assertEqual(self.g.fuzzy("goa"), "GOA")
+        self.assertIsNone(self.g.fuzzy("gao"))
+
+
+class DistanceTest(unittest.TestCase):
+    def test_levenshtein(self):
+        for a, b, d in [("", "abc", 3), ("kitten", "sitting", 3), ("delhi", "dehli", 2),
+                        ("manali", "panaji", 2), ("same", "same", 0)]:
+            with self.subTest(a=a, b=b):
+                self.assertEqual(levenshtein(a, b), d)
+
+    def test_transposed(self):
+        self.assertTrue(transposed("dehli", "delhi"))
+        self.assertFalse(transposed("delhi", "delhi"))
+        self.assertFalse(transposed("manali", "panaji"))
+        self.assertFalse(transposed("abcd", "badc"))     # two swaps
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Rate limits and admission: 429 and 503 answers, and refunds so a refused
+request costs the client nothing.
+
+Run from the smart_travel directory:
+
+  python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import json, tempfile, threading, unittest
+from unittest import mock
+
+from backend.app import App, Request
+from backend.limits import Admission, Limits, RateLimiter, Rejected
+from backend.sessions import SessionStore
+from backend.web import StaticFiles
+
+NOW = "backend.limits.time.monotonic"
+
+
+def limits(session_burst=0, ip_burst=0, max_active=0, max_queue=0) -> Limits:
+    """Buckets that never refill while a test runs (rate 1e-9/s)."""
+    return Limits(1e-9 if session_burst else 0, session_burst, 1e-9 if ip_burst else 0, ip_burst,
+                  max_active, max_queue, 0.01)
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_take_refill_refund(self):
+        r = RateLimiter(rate=1, burst=2)
+        with mock.patch(NOW, return_value=100.0):
+            self.assertEqual(r.take("k"), 0.0)
+            self.assertEqual(r.take("k"), 0.0)
+            self.assertEqual(r.take("k"), 1.0)          # empty: one second to the next token
+            r.refund("k", 1)
+            self.assertEqual(r.take("k"), 0.0)
+        with mock.patch(NOW, return_value=101.0):
+            self.assertEqual(r.take("k"), 0.0)
+
+    def test_cost_above_burst_is_debt(self):
+        r = RateLimiter(rate=1, burst=2)
+        with mock.patch(NOW, return_value=100.0):
+            self.assertEqual(r.take("k", 5), 0.0)
+            self.assertEqual(r.take("k"), 4.0)
+
+
+class LimitsTest(unittest.TestCase):
+    def tokens(self, limiter: RateLimiter, key: str) -> float:
+        return limiter._buckets[key][0]
+
+    def test_ip_limit(self):
+        lim = limits(ip_burst=2)
+        lim.check("a", "1.2.3.4")
+        lim.check("b", "1.2.3.4")
+        with self.assertRaises(Rejected) as e:
+            lim.check("c", "1.2.3.4")
+        self.assertEqual((e.exception.status, e.exception.reason), (429, "ip_rate"))
+
+    def test_session_rejection_refunds_ip_and_other_sessions(self):
+        lim = limits(session_burst=2, ip_burst=10)
+        lim.check("busy", "ip", cost=2)
+        with self.assertRaises(Rejected) as e:
+            lim.check_many("ip", {"idle": 1, "busy": 1}, 2)
+        self.assertEqual(e.exception.status, 429)
+        self.assertAlmostEqual(self.tokens(lim.ips, "ip"), 8, places=6)
+        self.assertAlmostEqual(self.tokens(lim.sessions, "idle"), 2, places=6)
+
+    def test_shed_request_is_refunded(self):
+        lim = limits(session_burst=5, ip_burst=5, max_active=1)
+        lim.enter("a", "ip")
+        for enter in (lambda: lim.enter("b", "ip"),
+                      lambda: lim.admit_batch("ip", {"b": 2, "c": 1}, 2).__enter__()):
+            with self.assertRaises(Rejected) as e:
+                enter()
+            self.assertEqual((e.exception.status, e.exception.reason), (503, "overloaded"))
+        self.assertAlmostEqual(self.tokens(lim.ips, "ip"), 4, places=6)
+        self.assertAlmostEqual(self.tokens(lim.sessions, "b"), 5, places=6)
+        self.assertAlmostEqual(self.tokens(lim.sessions, "c"), 5, places=6)
+        lim.leave()
+        lim.enter("b", "ip")
+
+
+class AdmissionTest(unittest.TestCase):
+    def test_queued_request_gets_the_released_slot(self):
+        adm = Admission(max_active=1, max_queue=1, timeout=5)
+        self.assertTrue(adm.acquire())
+        got = []
+        t = threading.Thread(target=lambda: got.append(adm.acquire()))
+        t.start()
+        while not adm.waiting:
+            pass
+        self.assertFalse(adm.acquire())              # queue full
+        adm.release()
+        t.join()
+        self.assertEqual(got, [True])
+
+    def test_wait_times_out(self):
+        adm = Admission(max_active=1, max_queue=1, timeout=0.01)
+        adm.acquire()
+        self.assertFalse(adm.acquire())
+
+
+class AppTest(unittest.TestCase):
+    def app(self, lim: Limits) -> App:
+        app = App(SessionStore(), StaticFiles(tempfile.mkdtemp()), lim)
+        self.addCleanup(app.close)
+        return app
+
+    def chat(self, app: App, sid: str):
+        body = json.dumps({"session_id": sid, "message": "hi"}).encode()
+        return app.handle(Request("POST", "/api/chat", body=body, client="ip"))
+
+    def test_429_and_503_answers(self):
+        app = self.app(limits(session_burst=1))
+        self.assertEqual(self.chat(app, "a").status, 200)
+        resp = self.chat(app, "a")
+        self.assertEqual((resp.status, resp.headers["Retry-After"]), (429, str(10 ** 9)))
+
+        app = self.app(limits(max_active=1))
+        app.limits.enter("other", "ip")
+        resp = self.chat(app, "a")
+        self.assertEqual((resp.status, resp.headers["Retry-After"]), (503, "1"))
+        self.assertEqual(json.loads(resp.body)["error"], "overloaded")
+
+
+if __name__ == "__main__":
+    unittest.main()
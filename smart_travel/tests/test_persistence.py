@@ -0,0 +1,72 @@
+"""
+Session persistence: snapshots round-trip, and rows that can't be read
+back are dropped instead of failing every request for their session.
+
+Run from the smart_travel directory:
+
+  python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import os, pickle, tempfile, unittest
+
+from backend.engine import TravelEngine
+from backend.persistence import (BadSnapshot, SNAPSHOT_FORMAT, SQLiteBackend,
+                                 dump_engine, load_engine)
+from backend.sessions import SessionStore
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_round_trip(self):
+        engine = TravelEngine()
+        engine.process("flight from delhi to mumbai")
+        again = load_engine(dump_engine(engine))
+        self.assertEqual(again.get_memory_snapshot(), engine.get_memory_snapshot())
+
+    def test_bad_snapshots(self):
+        blob = dump_engine(TravelEngine())
+        for name, bad in [("truncated", blob[:len(blob) // 2]),
+                          ("unstamped", pickle.dumps(TravelEngine())),
+                          ("other format", b"st0:" + blob[len(SNAPSHOT_FORMAT):])]:
+            with self.subTest(name):
+                with self.assertRaises(BadSnapshot):
+                    load_engine(bad)
+
+
+class RestoreTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.unlink, self.path)
+
+    def store(self) -> SessionStore:
+        store = SessionStore(backend=SQLiteBackend(self.path), flush_interval=60)
+        self.addCleanup(store.close)
+        return store
+
+    def test_restored_after_restart(self):
+        first = self.store()
+        first.process("s1", "flight from delhi to mumbai")
+        memory = first.snapshot("s1")
+        first.close()
+
+        second = self.store()
+        self.assertEqual(second.snapshot("s1"), memory)
+        self.assertEqual(second.stats()["restored"], 1)
+
+    def test_corrupt_row_starts_over(self):
+        backend = SQLiteBackend(self.path)
+        blob = dump_engine(TravelEngine())
+        backend.save_many({"s1": blob[:len(blob) // 2], "s2": pickle.dumps(TravelEngine())})
+        backend.close()
+
+        store = self.store()
+        with self.assertLogs("backend.sessions", "WARNING"):
+            for sid in ("s1", "s2"):
+                self.assertEqual(store.process(sid, "hi")[0]["type"], "message")
+        self.assertEqual(store.stats()["created"], 2)
+        store._writer.flush()
+        for sid in ("s1", "s2"):                  # rewritten as fresh sessions
+            load_engine(store._writer.backend.load(sid))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Shared search results: expiry, the size bound, and searches that race
+clear() or are abandoned part way.
+
+Run from the smart_travel directory:
+
+  python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import unittest
+from unittest import mock
+
+from backend import api
+from backend.api import SearchCache
+
+
+class SearchCacheTest(unittest.TestCase):
+    def test_entries_expire(self):
+        cache = SearchCache(10, ttl=60)
+        with mock.patch("backend.api.time.monotonic", return_value=1000.0):
+            cache.put(("flight", 1), ("a",), cache.generation)
+            self.assertEqual(cache.get(("flight", 1)), ("a",))
+        with mock.patch("backend.api.time.monotonic", return_value=1060.0):
+            self.assertIsNone(cache.get(("flight", 1)))
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 1, "misses": 1})
+
+    def test_least_recently_used_go_first(self):
+        cache = SearchCache(2, ttl=60)
+        for n in (1, 2):
+            cache.put(("flight", n), (n,), cache.generation)
+        cache.get(("flight", 1))
+        cache.put(("flight", 3), (3,), cache.generation)
+        self.assertIsNone(cache.get(("flight", 2)))
+        self.assertEqual(cache.get(("flight", 1)), (1,))
+        self.assertEqual(cache.get(("flight", 3)), (3,))
+
+    def test_search_running_across_clear_is_not_stored(self):
+        cache = SearchCache(10, ttl=60)
+        started = cache.generation
+        cache.clear()
+        cache.put(("hotel", 1), ("stale",), started)
+        self.assertIsNone(cache.get(("hotel", 1)))
+        cache.put(("hotel", 1), ("fresh",), cache.generation)
+        self.assertEqual(cache.get(("hotel", 1)), ("fresh",))
+
+    def test_disabled(self):
+        for size, ttl in ((0, 60), (10, 0)):
+            cache = SearchCache(size, ttl)
+            cache.put(("flight", 1), ("a",), cache.generation)
+            self.assertEqual(cache.stats()["size"], 0)
+
+
+class SharedSearchTest(unittest.TestCase):
+    def setUp(self):
+        saved = api.search_cache()
+        api.use_search_cache(100, 60)
+        self.addCleanup(setattr, api, "_results", saved)
+
+    def test_streamed_then_shared(self):
+        first = list(api.iter_flights("DEL", "BOM", "2026-05-12", 1))
+        again = list(api.iter_flights("del", "bom", "12/05/2026", 1))
+        self.assertTrue(first)
+        self.assertTrue(all(a is b for a, b in zip(first, again)))
+        self.assertEqual(api.search_cache().stats()["hits"], 1)
+
+    def test_abandoned_search_is_not_stored(self):
+        offers = api.iter_hotels("GOA", "2026-05-12", "2026-05-14", 2)
+        next(offers)
+        offers.close()
+        self.assertEqual(api.search_cache().stats()["size"], 0)
+
+    def test_inventory_swap_clears(self):
+        list(api.iter_flights("DEL", "BOM", "2026-05-12", 1))
+        running = api.iter_flights("BOM", "DEL", "2026-05-12", 1)
+        next(running)
+        api.use_flights(api.flight_inventory())
+        self.assertEqual(api.search_cache().stats()["size"], 0)
+        list(running)                             # finishes after the swap
+        self.assertEqual(api.search_cache().stats()["size"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Session store: the LRU bound and idle expiry, and long-polls on
+/api/memory that wake when their session is reset or evicted, not only
+when it changes.
+
+Run from the smart_travel directory:
+
+  python -m unittest discover tests      (or: python -m pytest tests)
+"""
+import threading, time, unittest
+from unittest import mock
+
+from backend.sessions import SessionStore
+
+NOW = "backend.sessions.time.monotonic"
+
+
+class EvictionTest(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        store = SessionStore(max_size=2)
+        store.snapshot("a")
+        store.snapshot("b")
+        store.process("a", "flight from delhi to mumbai")   # "b" is now the oldest
+        store.snapshot("c")
+        self.assertEqual(len(store), 2)
+        self.assertEqual(store.stats()["evicted_lru"], 1)
+        store.snapshot("a")                                  # still there
+        self.assertEqual(store.stats()["created"], 3)
+        store.snapshot("b")                                  # back, as a new session
+        self.assertEqual(store.stats()["created"], 4)
+
+    def test_idle_sessions_expire(self):
+        store = SessionStore(idle_ttl=60)
+        with mock.patch(NOW, return_value=1000.0):
+            store.snapshot("a")
+            store.snapshot("b")
+        with mock.patch(NOW, return_value=1030.0):
+            store.snapshot("b")
+        with mock.patch(NOW, return_value=1070.0):
+            store.sweep()                                    # "a" idle 70s, "b" 40s
+        self.assertEqual((len(store), store.stats()["evicted_idle"]), (1, 1))
+        with mock.patch(NOW, return_value=1100.0):
+            store.snapshot("c")                              # expiry also runs on lookup
+        self.assertEqual((len(store), store.stats()["evicted_idle"]), (1, 2))
+
+
+class LongPollTest(unittest.TestCase):
+    def poll(self, store: SessionStore, sid: str, since: str):
+        """memory(wait=5) on a thread; call the result to join it and get its answer."""
+        out = []
+        t = threading.Thread(target=lambda: out.append(store.memory(sid, since, wait=5)))
+        t.start()
+        self.addCleanup(t.join)
+        time.sleep(0.05)                          # let it start waiting
+
+        def answer() -> tuple:
+            t.join(1)
+            self.assertFalse(t.is_alive(), "long-poll still waiting")
+            return out[0]
+        return answer
+
+    def test_wakes_on_change(self):
+        store = SessionStore()
+        tag, _ = store.memory("a")
+        answer = self.poll(store, "a", tag)
+        store.process("a", "flight from delhi to mumbai")
+        new, snap = answer()
+        self.assertNotEqual(new, tag)
+        self.assertIsNotNone(snap)
+
+    def test_wakes_on_reset(self):
+        store = SessionStore()
+        tag, _ = store.memory("a")
+        answer = self.poll(store, "a", tag)
+        store.reset("a")
+        self.assertNotEqual(answer()[0], tag)
+
+    def test_wakes_on_eviction(self):
+        store = SessionStore(max_size=1)
+        tag, _ = store.memory("a")
+        answer = self.poll(store, "a", tag)
+        store.process("b", "hi")                  # evicts "a"
+        self.assertNotEqual(answer()[0], tag)
+
+
+if __name__ == "__main__":
+    unittest.main()